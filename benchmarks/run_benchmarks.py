@@ -0,0 +1,588 @@
+"""Reproducible load test for the Winova API.
+
+Starts main.py's FastAPI app under uvicorn in-process, against either a real
+mongod (--mongo-url) or an in-memory mongomock stand-in, with a local aiosmtpd
+sink standing in for the mail relay. Synthetic uploads follow the
+public/expanded_compliance_data.csv schema (see synthetic.py).
+
+Each scenario is driven by --concurrency clients and reports throughput and
+p50/p95/p99 latency. Every upload request sends a slightly different file (one
+cell of the first row carries a request counter), so uploads measure parsing
+and ingest rather than the compliance result cache or upload deduplication.
+
+profile_under_load repeats the profile scenario while --load-concurrency
+clients keep heavy requests in flight (regulatory data pages and compliance
+analyses of the largest synthetic file). Its p99 next to the plain profile
+p99 shows whether light endpoints stay responsive while heavy queries run.
+
+alerts_bulk_schedule posts a JSON list of --bulk-schedules alert schedules (a
+regulatory calendar: future deadlines with mixed priorities and recurrences)
+to /proactive-alerts/schedule/bulk, so each request validates, stores and
+registers scheduler jobs for the whole list.
+
+what_if_grid uploads each synthetic file to /what-if-calculator/grid and sweeps
+a 10x10 grid (WHAT_IF_GRID) of strictness multipliers and timelines over it in
+one request; on the 1M-row file its latency is the full grid sweep.
+
+download_ttfb streams compliance downloads of each upload size one at a time,
+plain (download_ttfb) and gzip-encoded (download_ttfb_gzip), and reports time to
+first byte next to the full download time, plus how far resident memory rose
+while each download ran. The server shares this process, but the client drops
+every chunk as it arrives, so the growth is the server's. Run it on a 1M-row
+input with --rows 1000000 --scenarios download_ttfb.
+
+upload_formats compares CSV, Parquet and Arrow IPC uploads of the same rows
+without the server: a fresh process per format and size times main's
+read_upload_frame, both reading every column (parse_<format>_all) and only the
+compliance analyzer's columns (parse_<format>), and reports how far resident
+memory rose during the parse (sampled from /proc, so Linux only).
+
+serialization also runs without the server: it renders a regulatory data page
+built from each synthetic file (row dicts with ids and timestamps) through
+FastAPI's default path, jsonable_encoder then JSONResponse (serialize_stdlib),
+and through main's dumps_json (serialize_orjson), reporting CPU time per MB of
+JSON produced.
+
+Results are written as JSON so runs on different commits can be compared:
+
+    python benchmarks/run_benchmarks.py --rows 1000,100000 --output bench/base.json
+    python benchmarks/run_benchmarks.py --rows 1000,100000 --compare bench/base.json
+
+Extra dependencies: pip install -r benchmarks/requirements.txt
+"""
+import argparse
+import asyncio
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(__file__))
+
+from synthetic import WRITERS, write_csv  # noqa: E402
+
+SCENARIOS = [
+    "login", "profile", "alerts",
+    "cost_benefit", "compliance_analyze", "compliance_download",
+    "regulatory_upload", "regulatory_data", "profile_under_load", "download_ttfb", "what_if_grid",
+    "alerts_bulk_schedule",
+]
+# Run in this process or spawned workers, without the server
+LOCAL_SCENARIOS = ["upload_formats", "serialization"]
+UPLOAD_SCENARIOS = {"cost_benefit", "compliance_analyze", "compliance_download", "regulatory_upload", "what_if_grid"}
+WHAT_IF_GRID = {
+    "strictness": ",".join(str(1 + step * 0.25) for step in range(10)),
+    "timelines": ",".join(str(years) for years in range(1, 11)),
+}
+USER = {"email": "bench@winova.io", "password": "bench-password", "full_name": "Bench User"}
+
+
+class UniqueCSV(io.RawIOBase):
+    """A CSV file streamed from disk with the last cell of its first data row replaced by token"""
+
+    def __init__(self, path: str, token: int):
+        self._file = open(path, "rb")
+        header = self._file.readline()
+        first_row = self._file.readline().rstrip(b"\r\n").rsplit(b",", 1)[0]
+        self._head = io.BytesIO(header + first_row + f",0.{token:09d}\n".encode())
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        return self._head.readinto(buffer) or self._file.readinto(buffer)
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+upload_tokens = itertools.count(1)
+
+
+def bulk_schedule_body(count: int) -> bytes:
+    """A JSON list of count future deadlines, spread over two years, with mixed priorities and recurrences"""
+    start = datetime.now(timezone.utc) + timedelta(days=30)
+    priorities = ["low", "medium", "high", "critical"]
+    recurrences = [None, None, None, "monthly", "weekly", "daily"]
+    schedules = [{
+        "alert_type": "compliance_deadline",
+        "title": f"Deadline {i}",
+        "description": "Synthetic regulatory calendar entry",
+        "trigger_date": (start + timedelta(minutes=i * 105)).isoformat(),
+        "advance_days": 7,
+        "recurrence": recurrences[i % len(recurrences)],
+        "priority": priorities[i % len(priorities)],
+    } for i in range(count)]
+    return json.dumps(schedules).encode()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_smtp_sink():
+    """Accept and discard every message, counting deliveries"""
+    from aiosmtpd.controller import Controller
+
+    class Sink:
+        delivered = 0
+
+        async def handle_DATA(self, server, session, envelope):
+            Sink.delivered += 1
+            return "250 OK"
+
+    controller = Controller(Sink(), hostname="127.0.0.1", port=free_port())
+    controller.start()
+    return controller
+
+
+def configure_environment(args, smtp_port: int):
+    os.environ.update({
+        "SMTP_HOST": "127.0.0.1",
+        "SMTP_PORT": str(smtp_port),
+        "SMTP_STARTTLS": "false",
+        "DATABASE_NAME": args.database,
+        "INDEX_COVERAGE_CHECK": "false",
+    })
+    if args.bcrypt_rounds:
+        os.environ["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+    if args.mongo_url:
+        os.environ["MONGODB_URL"] = args.mongo_url
+        import pymongo
+        pymongo.MongoClient(args.mongo_url).drop_database(args.database)
+    else:
+        import mongomock
+        import pymongo
+        pymongo.MongoClient = mongomock.MongoClient
+
+
+def start_server(port: int):
+    import uvicorn
+    import main
+
+    server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread
+
+
+def summarize(scenario, rows, latencies, errors, wall, concurrency):
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "scenario": scenario,
+        "rows": rows,
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / wall, 3) if wall else None,
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies_ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 3),
+    }
+
+
+async def measure(scenario, send, requests, concurrency, rows=None):
+    import httpx
+
+    latencies = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def client_loop():
+        nonlocal errors
+        for _ in remaining:
+            start = time.perf_counter()
+            try:
+                response = await send()
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    wall_start = time.perf_counter()
+    await asyncio.gather(*[client_loop() for _ in range(concurrency)])
+    result = summarize(scenario, rows, latencies, errors, time.perf_counter() - wall_start, concurrency)
+    print(f"{scenario:20} rows={str(rows or '-'):>9} rps={result['throughput_rps']:>9} "
+          f"p50={result['p50_ms']:>9}ms p95={result['p95_ms']:>9}ms p99={result['p99_ms']:>9}ms errors={errors}")
+    return result
+
+
+async def measure_under_load(scenario, send, requests, concurrency, heavy_requests, load_concurrency, rows=None):
+    """measure() while load_concurrency clients cycle through heavy_requests until it finishes"""
+    import httpx
+
+    stop = asyncio.Event()
+    heavy = itertools.cycle(heavy_requests)
+
+    async def load_loop():
+        while not stop.is_set():
+            try:
+                await next(heavy)()
+            except httpx.HTTPError:
+                pass
+
+    loaders = [asyncio.create_task(load_loop()) for _ in range(load_concurrency)]
+    # Let the heavy requests get in flight before timing starts
+    await asyncio.sleep(0.5)
+    try:
+        return await measure(scenario, send, requests, concurrency, rows)
+    finally:
+        stop.set()
+        await asyncio.gather(*loaders)
+
+
+async def measure_download(client, headers, path, requests, encoding, rows):
+    """Stream compliance downloads of path one after another, timing the first byte and the last"""
+    import httpx
+
+    scenario = "download_ttfb" if encoding == "identity" else f"download_ttfb_{encoding}"
+    latencies = []
+    first_bytes = []
+    errors = 0
+    peak_growth = 0.0
+    response_bytes = 0
+    wall_start = time.perf_counter()
+    for _ in range(requests):
+        with PeakRSS() as rss, io.BufferedReader(UniqueCSV(path, next(upload_tokens)), 1 << 20) as handle:
+            start = time.perf_counter()
+            first_byte = None
+            response_bytes = 0
+            try:
+                async with client.stream("POST", "/compliance-risk-calculator/download",
+                                         headers={**headers, "Accept-Encoding": encoding},
+                                         files={"file": (os.path.basename(path), handle, "text/csv")}) as response:
+                    if response.status_code >= 400:
+                        errors += 1
+                    # Raw bytes: gzip responses are counted as sent, not inflated on this side
+                    async for chunk in response.aiter_raw():
+                        if first_byte is None:
+                            first_byte = time.perf_counter()
+                        response_bytes += len(chunk)
+            except httpx.HTTPError:
+                errors += 1
+            end = time.perf_counter()
+        latencies.append(end - start)
+        first_bytes.append((first_byte or end) - start)
+        peak_growth = max(peak_growth, rss.growth)
+    result = summarize(scenario, rows, latencies, errors, time.perf_counter() - wall_start, 1)
+    ttfb_ms = np.array(first_bytes) * 1000
+    result["ttfb_p50_ms"] = round(float(np.percentile(ttfb_ms, 50)), 3)
+    result["ttfb_p99_ms"] = round(float(np.percentile(ttfb_ms, 99)), 3)
+    result["peak_rss_mb"] = round(peak_growth, 1)
+    result["response_mb"] = round(response_bytes / 2 ** 20, 1)
+    print(f"{scenario:20} rows={rows:>9} ttfb_p50={result['ttfb_p50_ms']:>9}ms p50={result['p50_ms']:>9}ms "
+          f"size={result['response_mb']}MB peak_rss=+{result['peak_rss_mb']}MB errors={errors}")
+    return result
+
+
+async def run_scenarios(args, base_url, data_files):
+    import httpx
+
+    results = []
+    selected = [name for name in SCENARIOS if name in args.scenarios]
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout) as client:
+        await client.post("/register", json=USER)
+        login = await client.post("/login", json={"email": USER["email"], "password": USER["password"]})
+        login.raise_for_status()
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+        # Seed alerts and one upload so the listing endpoints have data to return
+        for i in range(args.seed_alerts):
+            await client.post("/proactive-alerts/trigger-now", headers=headers, params={
+                "alert_type": "compliance_deadline", "title": f"Deadline {i}",
+                "description": "Synthetic alert", "priority": "medium",
+            })
+        with open(data_files[min(data_files)], "rb") as seed_file:
+            await client.post("/regulatory-scanner/upload", params={"stream": "true"}, headers=headers,
+                              files={"file": ("seed.csv", seed_file, "text/csv")})
+
+        def upload(path, url, params=None):
+            async def send():
+                with io.BufferedReader(UniqueCSV(path, next(upload_tokens)), 1 << 20) as handle:
+                    return await client.post(url, params=params, headers=headers,
+                                             files={"file": (os.path.basename(path), handle, "text/csv")})
+            return send
+
+        simple = {
+            "login": lambda: client.post("/login", json={"email": USER["email"], "password": USER["password"]}),
+            "profile": lambda: client.get("/profile", headers=headers),
+            "alerts": lambda: client.get("/proactive-alerts", headers=headers),
+            "regulatory_data": lambda: client.get("/regulatory-scanner/data", headers=headers),
+        }
+        bulk_body = bulk_schedule_body(args.bulk_schedules)
+        uploads = {
+            "cost_benefit": ("/cost-benefit-analysis/analyze", None),
+            "compliance_analyze": ("/compliance-risk-calculator/analyze", None),
+            "compliance_download": ("/compliance-risk-calculator/download", None),
+            "regulatory_upload": ("/regulatory-scanner/upload", {"stream": "true"}),
+            "what_if_grid": ("/what-if-calculator/grid", WHAT_IF_GRID),
+        }
+        for scenario in selected:
+            if scenario == "profile_under_load":
+                largest = max(data_files)
+                heavy_requests = [
+                    simple["regulatory_data"],
+                    upload(data_files[largest], "/compliance-risk-calculator/analyze"),
+                ]
+                results.append(await measure_under_load(scenario, simple["profile"], args.requests, args.concurrency,
+                                                        heavy_requests, args.load_concurrency, largest))
+            elif scenario == "download_ttfb":
+                for rows, path in sorted(data_files.items()):
+                    for encoding in ("identity", "gzip"):
+                        results.append(await measure_download(client, headers, path, args.upload_requests,
+                                                              encoding, rows))
+            elif scenario == "alerts_bulk_schedule":
+                def send():
+                    return client.post("/proactive-alerts/schedule/bulk", content=bulk_body,
+                                       headers={**headers, "Content-Type": "application/json"})
+                results.append(await measure(scenario, send, args.upload_requests, args.upload_concurrency,
+                                             args.bulk_schedules))
+            elif scenario in UPLOAD_SCENARIOS:
+                url, params = uploads[scenario]
+                for rows, path in sorted(data_files.items()):
+                    results.append(await measure(scenario, upload(path, url, params),
+                                                 args.upload_requests, args.upload_concurrency, rows))
+            else:
+                results.append(await measure(scenario, simple[scenario], args.requests, args.concurrency))
+    return results
+
+
+def current_rss_mb() -> float:
+    with open("/proc/self/statm") as handle:
+        return int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+
+
+class PeakRSS:
+    """Samples resident memory from a thread while the block runs; growth is the peak over the level at entry"""
+
+    def __enter__(self):
+        self.baseline = self.peak = current_rss_mb()
+        self._running = threading.Event()
+        self._running.set()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def _sample(self):
+        while self._running.is_set():
+            self.peak = max(self.peak, current_rss_mb())
+            time.sleep(0.001)
+
+    def __exit__(self, *exc_info):
+        self._running.clear()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss_mb())
+
+    @property
+    def growth(self) -> float:
+        return self.peak - self.baseline
+
+
+def parse_worker(path, columns, repeats, results):
+    """Time main.read_upload_frame on one file in a fresh process and report its peak RSS growth.
+
+    The process high-water mark already includes importing main, so resident memory is
+    sampled while each parse runs and compared with the level just before it (Linux only).
+    """
+    import main
+
+    with open(path, "rb") as handle:
+        data = handle.read()
+    latencies = []
+    peak_growth = 0.0
+    for _ in range(repeats):
+        with PeakRSS() as rss:
+            start = time.perf_counter()
+            frame = main.read_upload_frame(data, columns)
+            latencies.append(time.perf_counter() - start)
+        del frame
+        peak_growth = max(peak_growth, rss.growth)
+    results.put((latencies, peak_growth))
+
+
+def compare_upload_formats(args):
+    """Parse the same synthetic rows as CSV, Parquet and Arrow IPC, each in its own process"""
+    from main import COMPLIANCE_COLUMNS
+
+    results = []
+    context = multiprocessing.get_context("spawn")
+    for rows in args.rows:
+        for upload_format, writer in WRITERS.items():
+            path = writer(rows, args.data_dir)
+            for suffix, columns in (("_all", None), ("", sorted(COMPLIANCE_COLUMNS))):
+                queue = context.Queue()
+                worker = context.Process(target=parse_worker, args=(path, columns, args.parse_repeats, queue))
+                worker.start()
+                latencies, peak_rss_mb = queue.get()
+                worker.join()
+                result = summarize(f"parse_{upload_format}{suffix}", rows, latencies, 0, None, 1)
+                result["peak_rss_mb"] = round(peak_rss_mb, 1)
+                result["file_mb"] = round(os.path.getsize(path) / 2 ** 20, 1)
+                print(f"{result['scenario']:20} rows={rows:>9} file={result['file_mb']:>8}MB "
+                      f"p50={result['p50_ms']:>9}ms p99={result['p99_ms']:>9}ms peak_rss=+{result['peak_rss_mb']}MB")
+                results.append(result)
+    return results
+
+
+def serialization_payload(path):
+    """A regulatory data page for every row of path: the CSV columns plus the stored row metadata"""
+    import pandas as pd
+    from bson import ObjectId
+
+    records = pd.read_csv(path).to_dict("records")
+    upload_id = str(ObjectId())
+    uploaded_at = datetime.utcnow()
+    for row_number, record in enumerate(records):
+        record.update({"upload_id": upload_id, "row_number": row_number, "uploaded_at": uploaded_at})
+    return {"success": True, "data": records, "next_cursor": f"{uploaded_at.isoformat()}_{upload_id}_{len(records)}"}
+
+
+def compare_serializers(args, data_files):
+    """CPU time per MB of JSON for FastAPI's default response path and for main.dumps_json"""
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+
+    import main
+
+    serializers = {
+        "serialize_stdlib": lambda payload: JSONResponse(jsonable_encoder(payload)).body,
+        "serialize_orjson": lambda payload: main.FastJSONResponse(payload).body,
+    }
+    results = []
+    for rows, path in sorted(data_files.items()):
+        payload = serialization_payload(path)
+        for scenario, serialize in serializers.items():
+            latencies = []
+            cpu_seconds = 0.0
+            for _ in range(args.parse_repeats):
+                start, cpu_start = time.perf_counter(), time.process_time()
+                body = serialize(payload)
+                cpu_seconds += time.process_time() - cpu_start
+                latencies.append(time.perf_counter() - start)
+            output_mb = len(body) / 2 ** 20
+            result = summarize(scenario, rows, latencies, 0, None, 1)
+            result["output_mb"] = round(output_mb, 2)
+            result["cpu_ms_per_mb"] = round(1000 * cpu_seconds / (output_mb * args.parse_repeats), 3)
+            print(f"{scenario:20} rows={rows:>9} output={result['output_mb']:>8}MB "
+                  f"p50={result['p50_ms']:>9}ms cpu={result['cpu_ms_per_mb']:>9}ms/MB")
+            results.append(result)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, text=True).strip()
+    except Exception:
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as handle:
+        baseline = {(r["scenario"], r["rows"]): r for r in json.load(handle)["results"]}
+    print(f"\nComparison against {baseline_path}:")
+    for result in results:
+        previous = baseline.get((result["scenario"], result["rows"]))
+        if not previous:
+            continue
+        changes = []
+        for metric in ("throughput_rps", "p50_ms", "p99_ms", "ttfb_p50_ms", "peak_rss_mb", "cpu_ms_per_mb"):
+            if previous.get(metric) and result.get(metric) is not None:
+                changes.append(f"{metric} {100 * (result[metric] - previous[metric]) / previous[metric]:+.1f}%")
+        print(f"{result['scenario']:20} rows={str(result['rows'] or '-'):>9} " + "  ".join(changes))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo-url", help="Benchmark against this mongod instead of mongomock")
+    parser.add_argument("--database", default="winova_bench", help="Database name (dropped first with --mongo-url)")
+    parser.add_argument("--rows", default="1000,10000,100000",
+                        help="Comma-separated synthetic upload sizes, from 1000 up to 10000000")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS + LOCAL_SCENARIOS))
+    parser.add_argument("--requests", type=int, default=200, help="Requests per light scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--upload-requests", type=int, default=10, help="Requests per upload scenario and size")
+    parser.add_argument("--upload-concurrency", type=int, default=2)
+    parser.add_argument("--load-concurrency", type=int, default=4,
+                        help="Clients issuing heavy requests during profile_under_load")
+    parser.add_argument("--parse-repeats", type=int, default=5,
+                        help="Runs per format and size in upload_formats and serialization")
+    parser.add_argument("--seed-alerts", type=int, default=50)
+    parser.add_argument("--bulk-schedules", type=int, default=10000,
+                        help="Alert schedules per request in alerts_bulk_schedule")
+    parser.add_argument("--bcrypt-rounds", type=int, help="Override BCRYPT_ROUNDS for the run")
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "winova-bench"))
+    parser.add_argument("--output", default=None, help="JSON results path (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", help="Previous results JSON to diff against")
+    args = parser.parse_args()
+    args.scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    args.rows = sorted(int(rows) for rows in args.rows.split(","))
+    return args
+
+
+def main():
+    args = parse_args()
+    data_files = {rows: write_csv(rows, args.data_dir) for rows in args.rows}
+
+    smtp = start_smtp_sink()
+    configure_environment(args, smtp.port)
+    results = []
+    try:
+        if any(name in SCENARIOS for name in args.scenarios):
+            port = free_port()
+            server, thread = start_server(port)
+            try:
+                results = asyncio.run(run_scenarios(args, f"http://127.0.0.1:{port}", data_files))
+            finally:
+                server.should_exit = True
+                thread.join(timeout=30)
+    finally:
+        smtp.stop()
+    if "upload_formats" in args.scenarios:
+        results.extend(compare_upload_formats(args))
+    if "serialization" in args.scenarios:
+        results.extend(compare_serializers(args, data_files))
+
+    commit = git_commit()
+    report = {
+        "meta": {
+            "commit": commit,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "mongo": args.mongo_url or "mongomock",
+            "rows": args.rows,
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(os.path.dirname(__file__), "results", f"{(commit or 'unknown')[:12]}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as handle:
+        json.dump(report, handle, indent=2)
+    print(f"\nSaved results to {output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""Check that N app processes sharing one mongod fire each scheduled alert exactly once.
+
+Starts --processes copies of main.py's SchedulerLeader (each in its own spawned
+process, as separate uvicorn workers would be) against --mongo-url, schedules
+--jobs one-time alerts through the shared Mongo job store, and counts the
+proactive_alerts documents each job wrote. With --kill-leader the process
+holding the scheduler lease is SIGKILLed before the first alert is due, so the
+jobs are only fired once another process has taken the lease over.
+
+The lease and job store are shared through the database, so this needs a real
+mongod; mongomock is per-process and cannot show duplicate firing.
+
+    python benchmarks/scheduler_leader_check.py --mongo-url mongodb://localhost:27017 --processes 4 --jobs 200
+
+Exits non-zero if any job fired zero times or more than once.
+"""
+import argparse
+import multiprocessing
+import os
+import signal
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+
+
+def configure_environment(args):
+    os.environ.update({
+        "MONGODB_URL": args.mongo_url,
+        "DATABASE_NAME": args.database,
+        "SCHEDULER_LEASE_SECONDS": str(args.lease_seconds),
+        # Write every alert as soon as it fires, so the count is final once the jobs have run
+        "ALERT_COALESCE_SECONDS": "0",
+        "INDEX_COVERAGE_CHECK": "false",
+    })
+
+
+def leader_worker(args, ready, stop):
+    """Run the app's scheduler leader in this process until told to stop"""
+    configure_environment(args)
+    import main
+
+    main.scheduler_leader.start()
+    ready.set()
+    stop.wait()
+    main.scheduler_leader.stop()
+
+
+def wait_for_leader(leases, processes, timeout: float):
+    """Return the worker process currently holding the scheduler lease"""
+    deadline = time.monotonic() + timeout
+    by_pid = {process.pid: process for process in processes}
+    while time.monotonic() < deadline:
+        lease = leases.find_one({"_id": "scheduler", "expires_at": {"$gt": datetime.utcnow()}})
+        if lease:
+            # SCHEDULER_INSTANCE_ID is "<host>:<pid>:<nonce>"
+            pid = int(lease["owner"].split(":")[1])
+            if pid in by_pid and by_pid[pid].is_alive():
+                return by_pid[pid]
+        time.sleep(0.2)
+    raise SystemExit(f"No worker took the scheduler lease within {timeout:.0f}s")
+
+
+def schedule_jobs(args, run_id: str, first_due: datetime):
+    """Write the alert jobs through the batching job store, as the bulk endpoint does"""
+    import main
+
+    # Started paused so add_job writes to the shared store without this process running anything
+    main.scheduler.start(paused=True)
+    try:
+        spacing = args.spread / max(args.jobs - 1, 1)
+        with main.job_store.batch():
+            for index in range(args.jobs):
+                alert = {
+                    "user_id": run_id,
+                    "user_email": None,
+                    "alert_type": "scheduler_check",
+                    "title": f"check-{index}",
+                    "description": "scheduler leader check",
+                    "priority": "low",
+                }
+                main.add_alert_job(f"alert_{run_id}_{index}", alert, first_due + timedelta(seconds=index * spacing), None)
+    finally:
+        main.scheduler.shutdown(wait=False)
+
+
+def count_firings(database, run_id: str) -> dict:
+    pipeline = [{"$match": {"user_id": run_id}}, {"$group": {"_id": "$title", "count": {"$sum": 1}}}]
+    return {group["_id"]: group["count"] for group in database.proactive_alerts.aggregate(pipeline)}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo-url", required=True, help="Shared mongod every process connects to")
+    parser.add_argument("--database", default="winova_scheduler_check", help="Database name (dropped first)")
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--jobs", type=int, default=100)
+    parser.add_argument("--lease-seconds", type=int, default=3, help="SCHEDULER_LEASE_SECONDS for every process")
+    parser.add_argument("--lead", type=float, default=None,
+                        help="Seconds until the first alert is due (default: long enough for a lease takeover)")
+    parser.add_argument("--spread", type=float, default=10, help="Seconds between the first and last alert")
+    parser.add_argument("--kill-leader", action="store_true", help="SIGKILL the lease holder before any alert is due")
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+    if args.lead is None:
+        args.lead = args.lease_seconds * 3 + 5
+    return args
+
+
+def main():
+    args = parse_args()
+    configure_environment(args)
+    import pymongo
+
+    client = pymongo.MongoClient(args.mongo_url)
+    client.drop_database(args.database)
+    database = client[args.database]
+
+    context = multiprocessing.get_context("spawn")
+    stop = context.Event()
+    readiness = [context.Event() for _ in range(args.processes)]
+    processes = [context.Process(target=leader_worker, args=(args, ready, stop)) for ready in readiness]
+    for process in processes:
+        process.start()
+    run_id = uuid.uuid4().hex
+    try:
+        for ready in readiness:
+            if not ready.wait(args.timeout):
+                raise SystemExit("A worker did not start in time")
+        leader = wait_for_leader(database.scheduler_leases, processes, args.timeout)
+        print(f"{args.processes} processes started; leader is pid {leader.pid}")
+
+        first_due = datetime.utcnow() + timedelta(seconds=args.lead)
+        schedule_jobs(args, run_id, first_due)
+        print(f"Scheduled {args.jobs} alerts due over {args.spread:.0f}s starting in {args.lead:.0f}s")
+
+        if args.kill_leader:
+            os.kill(leader.pid, signal.SIGKILL)
+            leader.join()
+            successor = wait_for_leader(database.scheduler_leases, processes, args.timeout)
+            print(f"Killed leader pid {leader.pid}; pid {successor.pid} took over")
+
+        # Wait for the last alert, then a few lease periods more so late duplicates are caught
+        last_due = first_due + timedelta(seconds=args.spread)
+        deadline = time.monotonic() + min(args.timeout, (last_due - datetime.utcnow()).total_seconds() + args.lease_seconds * 3)
+        while time.monotonic() < deadline:
+            time.sleep(1)
+        firings = count_firings(database, run_id)
+    finally:
+        stop.set()
+        for process in processes:
+            process.join(timeout=30)
+            if process.is_alive():
+                process.terminate()
+
+    expected = {f"check-{index}" for index in range(args.jobs)}
+    missing = sorted(expected - set(firings))
+    duplicated = {title: count for title, count in firings.items() if count > 1}
+    print(f"{sum(firings.values())} alerts written for {args.jobs} jobs")
+    if missing or duplicated:
+        if missing:
+            print(f"Never fired: {len(missing)} jobs, e.g. {missing[:5]}")
+        if duplicated:
+            print(f"Fired more than once: {len(duplicated)} jobs, e.g. {dict(list(duplicated.items())[:5])}")
+        raise SystemExit(1)
+    print("OK: every job fired exactly once")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Synthetic upload data following the public/expanded_compliance_data.csv schema.
+
+Every generated file carries the reference columns (Industry, Revenue, Emissions,
+NumFacilities, CO2ReductionTarget, Timeline, StrictnessLevel, ComplianceCost) plus
+the columns the analyzers require, so one file per size can be sent to every
+upload endpoint. The same rows can be written as CSV, Parquet or an Arrow IPC
+file, for comparing the upload formats.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+REFERENCE_CSV = os.path.join(os.path.dirname(__file__), "..", "public", "expanded_compliance_data.csv")
+REFERENCE_COLUMNS = [
+    "Industry", "Revenue", "Emissions", "NumFacilities",
+    "CO2ReductionTarget", "Timeline", "StrictnessLevel", "ComplianceCost",
+]
+STRATEGIES = ["Energy Efficiency", "Renewable Energy", "Carbon Capture", "Process Optimization", "Waste Reduction"]
+
+
+def load_reference():
+    """Industry mix and per-column ranges taken from the reference dataset"""
+    reference = pd.read_csv(REFERENCE_CSV)
+    industries = reference["Industry"].value_counts(normalize=True)
+    ranges = {
+        column: (float(reference[column].min()), float(reference[column].max()))
+        for column in REFERENCE_COLUMNS[1:]
+    }
+    return industries, ranges
+
+
+def generate_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    industries, ranges = load_reference()
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "Industry": rng.choice(industries.index.to_numpy(), size=rows, p=industries.to_numpy()),
+    })
+    for column, (low, high) in ranges.items():
+        if column in ("NumFacilities", "CO2ReductionTarget", "Timeline", "StrictnessLevel"):
+            df[column] = rng.integers(int(low), int(high) + 1, size=rows)
+        else:
+            df[column] = rng.uniform(low, high, size=rows).round(2)
+    companies = max(1, rows // 10)
+    company = np.char.add("Company ", rng.integers(0, companies, size=rows).astype(str))
+    df["company_name"] = company
+    df["compliance_cost"] = (df["ComplianceCost"] * 1000).round(2)
+    df["penalty_cost"] = (df["compliance_cost"] * rng.uniform(0.5, 1.5, size=rows)).round(2)
+    df["company"] = company
+    df["strategy"] = rng.choice(STRATEGIES, size=rows)
+    df["cost"] = rng.integers(10_000, 1_000_000, size=rows)
+    df["projected_savings"] = (df["cost"] * rng.uniform(0.5, 3.0, size=rows)).round(0).astype(int)
+    df["waste_reduction"] = rng.uniform(0, 50, size=rows).round(1)
+    return df
+
+
+CHUNK_ROWS = 1_000_000
+
+
+def _write_once(path: str, write) -> str:
+    """Call write(temporary_path) unless path already exists, then rename the result into place.
+
+    An interrupted run therefore never leaves a truncated file behind to be reused.
+    """
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        partial = f"{path}.{os.getpid()}.partial"
+        try:
+            write(partial)
+            os.replace(partial, path)
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+    return path
+
+
+def _frames(rows: int, seed: int):
+    for index, start in enumerate(range(0, rows, CHUNK_ROWS)):
+        yield generate_frame(min(CHUNK_ROWS, rows - start), seed=seed + index)
+
+
+def write_csv(rows: int, directory: str, seed: int = 0) -> str:
+    """Write (or reuse) a synthetic CSV with the given number of rows and return its path"""
+    def write(path):
+        for index, frame in enumerate(_frames(rows, seed)):
+            frame.to_csv(path, mode="a" if index else "w", header=not index, index=False)
+    return _write_once(os.path.join(directory, f"synthetic_{rows}.csv"), write)
+
+
+def _write_arrow_tables(rows: int, seed: int, open_writer):
+    import pyarrow as pa
+
+    writer = None
+    try:
+        for frame in _frames(rows, seed):
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if writer is None:
+                writer = open_writer(table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def write_parquet(rows: int, directory: str, seed: int = 0) -> str:
+    """Write (or reuse) the same rows as write_csv as a Parquet file and return its path"""
+    import pyarrow.parquet as pq
+
+    def write(path):
+        _write_arrow_tables(rows, seed, lambda schema: pq.ParquetWriter(path, schema))
+    return _write_once(os.path.join(directory, f"synthetic_{rows}.parquet"), write)
+
+
+def write_arrow(rows: int, directory: str, seed: int = 0) -> str:
+    """Write (or reuse) the same rows as write_csv as an Arrow IPC file and return its path"""
+    import pyarrow as pa
+
+    def write(path):
+        _write_arrow_tables(rows, seed, lambda schema: pa.ipc.new_file(path, schema))
+    return _write_once(os.path.join(directory, f"synthetic_{rows}.arrow"), write)
+
+
+WRITERS = {"csv": write_csv, "parquet": write_parquet, "arrow": write_arrow}
@@ -1,18 +1,38 @@
-from fastapi import FastAPI, Depends, HTTPException, status, File, UploadFile
+from fastapi import FastAPI, Depends, HTTPException, status, File, UploadFile, Request
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel, EmailStr
 from passlib.context import CryptContext
 from jose import jwt, JWTError
-from typing import Optional
-from datetime import datetime, timedelta
+from typing import Optional, List
+from datetime import date, datetime, timedelta, timezone
 from dotenv import load_dotenv
-from pymongo import MongoClient
+from pymongo import MongoClient, ReplaceOne, ReturnDocument, ASCENDING, DESCENDING, monitoring
 from bson import ObjectId
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from logging.handlers import QueueHandler, QueueListener
+import orjson
+import asyncio
+import atexit
+import contextvars
+import functools
+import json
+import logging
 import os
+import queue
+import random
+import signal
 import smtplib
+import struct
+import sys
+import threading
+import time
+import uuid
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
 
 load_dotenv()
 
@@ -28,49 +48,446 @@ SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
 SMTP_PORT = int(os.getenv("SMTP_PORT", 587))
 SMTP_USER = os.getenv("SMTP_USER", "your-email@gmail.com")
 SMTP_PASS = os.getenv("SMTP_PASS", "your-app-password")
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() == "true"
+
+# Email outbox configuration
+EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE", 50))
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", 5))
+EMAIL_RETRY_BASE_SECONDS = float(os.getenv("EMAIL_RETRY_BASE_SECONDS", 30))
+EMAIL_POLL_SECONDS = float(os.getenv("EMAIL_POLL_SECONDS", 5))
+EMAIL_IDLE_DISCONNECT_SECONDS = float(os.getenv("EMAIL_IDLE_DISCONNECT_SECONDS", 60))
+EMAIL_CLAIM_TIMEOUT_SECONDS = 300
+
+# Metrics, exposed in Prometheus text format at /metrics
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+HTTP_REQUEST_DURATION = Histogram(
+    "winova_http_request_duration_seconds", "HTTP request latency by route",
+    ["method", "route", "status"], buckets=LATENCY_BUCKETS
+)
+MONGO_OPERATION_DURATION = Histogram(
+    "winova_mongo_operation_duration_seconds", "MongoDB command latency by collection",
+    ["collection", "command", "outcome"], buckets=LATENCY_BUCKETS
+)
+UPLOAD_PARSE_DURATION = Histogram(
+    "winova_upload_parse_duration_seconds", "Time spent parsing uploads per analyzer",
+    ["analyzer", "format"], buckets=LATENCY_BUCKETS
+)
+UPLOAD_ROWS = Counter("winova_upload_rows_total", "Rows parsed from uploads per analyzer", ["analyzer"])
+SMTP_SEND_DURATION = Histogram("winova_smtp_send_duration_seconds", "SMTP send latency", buckets=LATENCY_BUCKETS)
+SMTP_SEND_FAILURES = Counter("winova_smtp_send_failures_total", "SMTP sends that raised an error")
+SCHEDULER_JOB_LAG = Histogram(
+    "winova_scheduler_job_lag_seconds", "Delay between a job's scheduled time and its submission",
+    ["job_kind"], buckets=LATENCY_BUCKETS
+)
+SCHEDULER_JOBS_MISSED = Counter("winova_scheduler_jobs_missed_total", "Scheduled runs skipped as misfires", ["job_kind"])
+
+def observe_upload_parse(analyzer: str, upload_format: str, seconds: float, rows: int):
+    UPLOAD_PARSE_DURATION.labels(analyzer, upload_format).observe(seconds)
+    UPLOAD_ROWS.labels(analyzer).inc(rows)
+
+class MongoMetricsListener(monitoring.CommandListener):
+    """Times every MongoDB command, labelled by collection"""
+
+    def __init__(self):
+        self._pending = {}
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        self._pending[(event.connection_id, event.request_id)] = collection if isinstance(collection, str) else ""
+
+    def _observe(self, event, outcome):
+        collection = self._pending.pop((event.connection_id, event.request_id), "")
+        MONGO_OPERATION_DURATION.labels(collection, event.command_name, outcome).observe(event.duration_micros / 1e6)
+
+    def succeeded(self, event):
+        self._observe(event, "success")
+
+    def failed(self, event):
+        self._observe(event, "failure")
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency under the matched route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.labels(
+                scope["method"], getattr(route, "path", "unmatched"), str(status_code)
+            ).observe(time.perf_counter() - started)
+
+# Structured logging: records are queued on the request thread and written as JSON by a listener thread
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", 0.01))
+LOG_RECORDS_DROPPED = Counter("winova_log_records_dropped_total", "Log records dropped because the queue was full")
+LOG_RECORDS_SAMPLED_OUT = Counter("winova_log_records_sampled_out_total", "DEBUG log records skipped by sampling")
+
+request_id_var = contextvars.ContextVar("request_id", default=None)
+_LOG_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "request_id"}
+
+class RequestContextFilter(logging.Filter):
+    """Samples DEBUG records and stamps the rest with the current correlation ID"""
+
+    def filter(self, record):
+        if record.levelno <= logging.DEBUG and random.random() >= LOG_DEBUG_SAMPLE_RATE:
+            LOG_RECORDS_SAMPLED_OUT.inc()
+            return False
+        record.request_id = request_id_var.get()
+        return True
+
+class JsonLogFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.utcfromtimestamp(record.created).isoformat() + "Z",
+            "level": record.levelname,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in _LOG_RECORD_ATTRS})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Hands records to the listener thread without ever blocking the caller"""
+
+    def prepare(self, record):
+        # Resolve the message now (args may be mutated later); formatting stays on the listener
+        record.msg, record.args = record.getMessage(), None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+log_queue = queue.Queue(LOG_QUEUE_SIZE)
+_log_output = logging.StreamHandler(sys.stdout)
+_log_output.setFormatter(JsonLogFormatter())
+log_listener = QueueListener(log_queue, _log_output)
+_log_handler = NonBlockingQueueHandler(log_queue)
+_log_handler.addFilter(RequestContextFilter())
+
+logger = logging.getLogger("winova")
+logger.setLevel(LOG_LEVEL)
+logger.addHandler(_log_handler)
+logger.propagate = False
+log_listener.start()
+# Stopped at interpreter exit rather than in a shutdown hook, so records logged by
+# later shutdown hooks (such as the alert coalescer's final flush) are still written
+atexit.register(log_listener.stop)
+
+class RequestContextMiddleware:
+    """ASGI middleware assigning each request a correlation ID, echoed as X-Request-ID"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        request_id = headers.get(b"x-request-id", b"").decode("latin-1")[:64] or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(token)
+
+# Indexes backing every query the app issues: (collection, keys, options)
+INDEX_SPECS = [
+    ("users", [("email", ASCENDING)], {"unique": True}),
+    ("user_settings", [("user_id", ASCENDING)], {}),
+    ("proactive_alerts", [("user_id", ASCENDING), ("triggered_at", DESCENDING)], {}),
+    ("alert_schedules", [("user_id", ASCENDING), ("created_at", DESCENDING)], {}),
+    ("automated_reports", [("user_id", ASCENDING), ("generated_at", DESCENDING)], {}),
+    ("regulatory_data", [("user_id", ASCENDING), ("upload_date", DESCENDING), ("_id", DESCENDING)], {}),
+    ("regulatory_rows", [("upload_id", ASCENDING), ("row_number", ASCENDING)], {}),
+    ("regulatory_contents", [("user_id", ASCENDING), ("sha256", ASCENDING)], {"unique": True}),
+    ("regulatory_datasets", [("user_id", ASCENDING), ("name", ASCENDING)], {"unique": True}),
+    ("dataset_rows", [("dataset_id", ASCENDING), ("key", ASCENDING)], {"unique": True}),
+    ("dataset_rows", [("dataset_id", ASCENDING), ("_id", ASCENDING)], {}),
+    ("email_outbox", [("status", ASCENDING), ("next_attempt_at", ASCENDING)], {}),
+    ("alert_schedules", [("enabled", ASCENDING), ("job_id", ASCENDING)], {}),
+    ("report_schedules", [("enabled", ASCENDING), ("job_id", ASCENDING)], {}),
+    ("scheduler_jobs", [("next_run_time", ASCENDING)], {"sparse": True}),
+    ("regulatory_stats", [("user_id", ASCENDING)], {"unique": True}),
+]
+
+def _filter_fields(query: dict) -> set:
+    fields = set()
+    for key, value in (query or {}).items():
+        if key in ("$or", "$and"):
+            for clause in value:
+                fields |= _filter_fields(clause)
+        elif not key.startswith("$"):
+            fields.add(key)
+    return fields
+
+def _is_id_lookup(query: dict) -> bool:
+    # Equality (or $in) on _id is served by the implicit _id index; ranges and sorts are not
+    value = (query or {}).get("_id")
+    if value is None:
+        return False
+    if isinstance(value, dict) and any(key.startswith("$") for key in value):
+        return set(value) <= {"$eq", "$in"}
+    return True
+
+class IndexCoverageListener(monitoring.CommandListener):
+    """Logs, once per query shape, any query whose filter or sort no index in INDEX_SPECS can serve"""
+
+    COMMANDS = {"find": ("filter", "sort"), "findAndModify": ("query", "sort"), "aggregate": None,
+                "update": "updates", "delete": "deletes"}
+
+    def __init__(self):
+        self._indexes = {}
+        for collection, keys, _options in INDEX_SPECS:
+            self._indexes.setdefault(collection, []).append([field for field, _direction in keys])
+        self._reported = set()
+
+    def _queries(self, name, command):
+        spec = self.COMMANDS[name]
+        if name == "aggregate":
+            pipeline = command.get("pipeline") or [{}]
+            yield pipeline[0].get("$match", {}), {}
+        elif isinstance(spec, tuple):
+            yield command.get(spec[0]) or {}, command.get(spec[1]) or {}
+        else:
+            for statement in command.get(spec, []):
+                yield statement.get("q", {}), {}
+
+    def _is_covered(self, collection, fields, sort_fields, id_lookup):
+        if id_lookup:
+            return True
+        return any(
+            (keys[0] in fields or (not fields and keys[0] in sort_fields)) and sort_fields <= set(keys)
+            for keys in self._indexes.get(collection, [])
+        )
+
+    def started(self, event):
+        if event.command_name not in self.COMMANDS:
+            return
+        collection = event.command.get(event.command_name)
+        for query, sort in self._queries(event.command_name, event.command):
+            fields = _filter_fields(query)
+            sort_fields = set(sort)
+            id_lookup = _is_id_lookup(query)
+            shape = (collection, frozenset(fields), frozenset(sort_fields), id_lookup)
+            if shape in self._reported or self._is_covered(collection, fields, sort_fields, id_lookup):
+                continue
+            self._reported.add(shape)
+            logger.warning("Query not covered by an index", extra={"collection": collection, "filter": sorted(fields), "sort": sorted(sort_fields)})
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+INDEX_COVERAGE_CHECK = os.getenv("INDEX_COVERAGE_CHECK", "true").lower() == "true"
 
 # MongoDB setup
-client = MongoClient(MONGODB_URL)
+client = MongoClient(
+    MONGODB_URL,
+    event_listeners=[MongoMetricsListener()] + ([IndexCoverageListener()] if INDEX_COVERAGE_CHECK else [])
+)
 db = client[DATABASE_NAME]
 users_collection = db.users
 settings_collection = db.user_settings
 
+def ensure_indexes():
+    """Create every index in INDEX_SPECS; create_index is a no-op when it already exists"""
+    for collection, keys, options in INDEX_SPECS:
+        try:
+            db[collection].create_index(keys, **options)
+        except Exception as e:
+            logger.error("Could not create index", extra={"collection": collection, "keys": keys, "error": str(e)})
+
+# pymongo is blocking, so async handlers hand their queries to a dedicated,
+# bounded pool instead of running them on the event loop. Keeping it separate
+# from the default threadpool stops slow queries starving sync endpoints.
+DB_MAX_WORKERS = int(os.getenv("DB_MAX_WORKERS", 16))
+db_executor = ThreadPoolExecutor(max_workers=DB_MAX_WORKERS, thread_name_prefix="mongo")
+
+async def run_db(func, *args, **kwargs):
+    """Run a blocking database call on the database pool"""
+    loop = asyncio.get_running_loop()
+    # Copy the context so log records from the pool keep the request's correlation ID
+    return await loop.run_in_executor(db_executor, functools.partial(contextvars.copy_context().run, func, *args, **kwargs))
+
+class TTLCache:
+    """Thread-safe, size-bounded LRU cache whose entries expire after ttl seconds"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._entries), "maxsize": self.maxsize, "ttl": self.ttl, "hits": self.hits, "misses": self.misses}
+
+# Authenticated user documents, keyed by token subject (email)
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", 30))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", 1024))
+user_cache = TTLCache(USER_CACHE_SIZE, USER_CACHE_TTL_SECONDS)
+
 # Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+# bcrypt runs on its own small pool. Once PASSWORD_HASH_MAX_QUEUE jobs are
+# waiting behind the workers, new logins are rejected with 503 instead of
+# piling up and starving the rest of the API.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", 32))
+password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+_password_jobs = 0
+_password_jobs_lock = threading.Lock()
+
+def _reserve_password_slot() -> bool:
+    global _password_jobs
+    with _password_jobs_lock:
+        if _password_jobs >= PASSWORD_HASH_WORKERS + PASSWORD_HASH_MAX_QUEUE:
+            return False
+        _password_jobs += 1
+        return True
+
+def _release_password_slot(_future=None):
+    global _password_jobs
+    with _password_jobs_lock:
+        _password_jobs -= 1
+
+async def run_password_job(func, *args):
+    """Run a bcrypt call on the password pool, or fail fast with 503 when it is saturated"""
+    if not _reserve_password_slot():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication service is busy, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    future = password_executor.submit(func, *args)
+    future.add_done_callback(_release_password_slot)
+    return await asyncio.wrap_future(future)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 
-app = FastAPI(title="Winova API", version="1.0.0")
+# JSON encoding via orjson: datetimes and numpy values are native, NaN/inf become null
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+def _orjson_default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    # orjson handles plain datetimes itself but rejects subclasses such as pd.Timestamp
+    if value is pd.NaT:
+        return None
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+def dumps_json(content) -> bytes:
+    return orjson.dumps(content, default=_orjson_default, option=ORJSON_OPTIONS)
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson. Returning one from an endpoint also skips
+    FastAPI's jsonable_encoder pass and response_model re-validation"""
+
+    def render(self, content) -> bytes:
+        return dumps_json(content)
+
+app = FastAPI(title="Winova API", version="1.0.0", default_response_class=FastJSONResponse)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(RequestContextMiddleware)
+
+@app.get("/metrics")
+def metrics():
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
 
 # --- Cost-Benefit Analysis Endpoint ---
-@app.post("/cost-benefit-analysis/analyze")
-async def analyze_cost_benefit(file: UploadFile = File(...)):
-    import io
+def rank_strategies_by_roi(df):
+    """Rank every company's strategies by ROI in a single columnar pass"""
+    import numpy as np
     import pandas as pd
-    content = await file.read()
-    df = pd.read_csv(io.BytesIO(content))
-    required_cols = {"company", "strategy", "cost", "projected_savings", "waste_reduction"}
-    if not required_cols.issubset(df.columns):
-        raise HTTPException(status_code=400, detail=f"CSV must contain columns: {', '.join(required_cols)}")
+    cost = df["cost"]
+    roi = ((df["projected_savings"] - cost) / cost * 100).where(cost != 0, 0).round(2)
+    # Group codes follow first appearance, matching df['company'].unique()
+    codes, uniques = pd.factorize(df["company"], use_na_sentinel=False)
+    ranked = pd.DataFrame({
+        "group": codes,
+        "strategy": df["strategy"].values,
+        "cost": cost.values,
+        "savings": df["projected_savings"].values,
+        "waste_reduction": df["waste_reduction"].values,
+        "roi": roi.values,
+    }).sort_values(["group", "roi"], ascending=[True, False], kind="stable")
+    options = ranked.drop(columns="group").to_dict("records")
+    bounds = np.concatenate(([0], np.cumsum(np.bincount(codes, minlength=len(uniques)))))
+    companies = uniques.tolist()
     results = []
-    companies = df['company'].unique().tolist()
-    for company in companies:
-        company_df = df[df['company'] == company]
-        options = []
-        for _, row in company_df.iterrows():
-            roi = (row['projected_savings'] - row['cost']) / row['cost'] * 100 if row['cost'] else 0
-            options.append({
-                "strategy": row['strategy'],
-                "cost": row['cost'],
-                "savings": row['projected_savings'],
-                "waste_reduction": row['waste_reduction'],
-                "roi": round(roi, 2)
-            })
-        sorted_options = sorted(options, key=lambda x: x['roi'], reverse=True)
-        top = sorted_options[0] if sorted_options else {}
+    for i, company in enumerate(companies):
+        sorted_options = options[bounds[i]:bounds[i + 1]]
+        top = sorted_options[0]
         company_data = {
-            "initialCost": f"${top['cost']:,}" if top else "",
-            "annualSavings": f"${top['savings']:,}" if top else "",
-            "roi": f"{top['roi']}%" if top else "",
+            "initialCost": f"${top['cost']:,}",
+            "annualSavings": f"${top['savings']:,}",
+            "roi": f"{top['roi']}%",
             "paybackPeriod": "",  # Add if available in CSV
             "implementationTime": ""  # Add if available in CSV
         }
@@ -79,10 +496,22 @@ async def analyze_cost_benefit(file: UploadFile = File(...)):
             "companyData": company_data,
             "roiRankings": sorted_options,
             "strategies": sorted_options,
-            "recommendations": [
-                f"Best strategy: {top['strategy']}" if top else "No strategies found."
-            ] if top else [],
+            "recommendations": [f"Best strategy: {top['strategy']}"],
         })
+    return companies, results
+
+COST_BENEFIT_COLUMNS = {"company", "strategy", "cost", "projected_savings", "waste_reduction"}
+
+def analyze_cost_benefit_frame(df):
+    required_cols = COST_BENEFIT_COLUMNS
+    if not required_cols.issubset(df.columns):
+        raise HTTPException(status_code=400, detail=f"CSV must contain columns: {', '.join(required_cols)}")
+    return rank_strategies_by_roi(df)
+
+@app.post("/cost-benefit-analysis/analyze")
+async def analyze_cost_benefit(request: Request, file: UploadFile = File(...)):
+    async with SharedUpload(file) as upload:
+        companies, results = await run_analytics_job(request, analyze_cost_benefit_frame, upload, COST_BENEFIT_COLUMNS)
     # Return companies list for dropdown
     return {"results": results, "companies": companies}
 
@@ -147,6 +576,16 @@ class Token(BaseModel):
     token_type: str
     user: UserResponse
 
+def user_response(user: dict) -> dict:
+    """The public UserResponse fields of a user document"""
+    return {
+        "id": user.get("id") or str(user["_id"]),
+        "email": user["email"],
+        "full_name": user.get("full_name"),
+        "is_active": user.get("is_active", True),
+        "created_at": user.get("created_at"),
+    }
+
 # Password utilities
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
@@ -154,6 +593,19 @@ def get_password_hash(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+def upgrade_password_hash(user_id, plain_password: str):
+    """Re-hash a password with the configured bcrypt cost"""
+    users_collection.update_one(
+        {"_id": user_id},
+        {"$set": {"hashed_password": get_password_hash(plain_password)}}
+    )
+
+def schedule_password_upgrade(user_id, plain_password: str):
+    """Upgrade a stale hash in the background; skipped while the password pool is saturated"""
+    if _reserve_password_slot():
+        future = password_executor.submit(upgrade_password_hash, user_id, plain_password)
+        future.add_done_callback(_release_password_slot)
+
 # JWT utilities
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -179,40 +631,193 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
     except JWTError:
         raise credentials_exception
     
-    user = users_collection.find_one({"email": email})
+    user = user_cache.get(email)
     if user is None:
-        raise credentials_exception
-    
-    # Convert ObjectId to string for JSON serialization
-    user["id"] = str(user["_id"])
-    return user
+        user = users_collection.find_one({"email": email})
+        if user is None:
+            raise credentials_exception
+        
+        # Convert ObjectId to string for JSON serialization
+        user["id"] = str(user["_id"])
+        user_cache.set(email, user)
+    return dict(user)
 
 # Email utility
+# Messages are persisted to the email_outbox collection and delivered by a
+# background worker, so request handlers never wait on the mail relay.
+outbox_collection = db.email_outbox
 
 def send_email(to_email, subject, body):
-    msg = MIMEMultipart()
-    msg["From"] = SMTP_USER
-    msg["To"] = to_email
-    msg["Subject"] = subject
-    msg.attach(MIMEText(body, "plain"))
-    try:
-        with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as server:
-            server.starttls()
-            server.login(SMTP_USER, SMTP_PASS)
-            server.sendmail(SMTP_USER, to_email, msg.as_string())
-    except Exception as e:
-        print(f"Error sending email: {e}")
+    """Queue an email for delivery by the outbox worker"""
+    now = datetime.utcnow()
+    outbox_collection.insert_one({
+        "to": to_email,
+        "subject": subject,
+        "body": body,
+        "status": "pending",
+        "attempts": 0,
+        "next_attempt_at": now,
+        "created_at": now
+    })
+    email_outbox.wake()
+
+class EmailOutboxWorker:
+    """Delivers queued emails in batches over one reused, authenticated SMTP session"""
+
+    def __init__(self):
+        self._smtp = None
+        self._last_used = 0.0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="email-outbox", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+        self._close()
+
+    def wake(self):
+        self._wake.set()
+
+    def _connect(self):
+        if self._smtp is None:
+            server = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=30)
+            # has_extn only sees extensions advertised in an EHLO reply, and STARTTLS resets them
+            server.ehlo()
+            if SMTP_STARTTLS:
+                server.starttls()
+                server.ehlo()
+            if server.has_extn("auth"):
+                server.login(SMTP_USER, SMTP_PASS)
+            self._smtp = server
+        return self._smtp
+
+    def _close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                pass
+            self._smtp = None
+
+    def _claim_batch(self):
+        """Atomically claim due messages so concurrent workers never send the same one"""
+        now = datetime.utcnow()
+        due = {"$or": [
+            {"status": "pending", "next_attempt_at": {"$lte": now}},
+            {"status": "sending", "claimed_at": {"$lt": now - timedelta(seconds=EMAIL_CLAIM_TIMEOUT_SECONDS)}}
+        ]}
+        batch = []
+        while len(batch) < EMAIL_BATCH_SIZE:
+            message = outbox_collection.find_one_and_update(
+                due,
+                {"$set": {"status": "sending", "claimed_at": now}},
+                sort=[("next_attempt_at", 1)],
+                return_document=ReturnDocument.AFTER
+            )
+            if message is None:
+                break
+            batch.append(message)
+        return batch
+
+    def _deliver(self, message):
+        msg = MIMEMultipart()
+        msg["From"] = SMTP_USER
+        msg["To"] = message["to"]
+        msg["Subject"] = message["subject"]
+        msg.attach(MIMEText(message["body"], "plain"))
+        started = time.perf_counter()
+        try:
+            try:
+                self._connect().sendmail(SMTP_USER, message["to"], msg.as_string())
+            except smtplib.SMTPServerDisconnected:
+                # The relay dropped the idle session; reconnect once and retry
+                self._smtp = None
+                self._connect().sendmail(SMTP_USER, message["to"], msg.as_string())
+        except Exception:
+            SMTP_SEND_FAILURES.inc()
+            raise
+        finally:
+            SMTP_SEND_DURATION.observe(time.perf_counter() - started)
+        self._last_used = time.monotonic()
+
+    def _record_failure(self, message, error):
+        attempts = message.get("attempts", 0) + 1
+        update = {"attempts": attempts, "last_error": str(error)}
+        if attempts >= EMAIL_MAX_ATTEMPTS:
+            update["status"] = "failed"
+        else:
+            update["status"] = "pending"
+            update["next_attempt_at"] = datetime.utcnow() + timedelta(
+                seconds=EMAIL_RETRY_BASE_SECONDS * 2 ** (attempts - 1)
+            )
+        outbox_collection.update_one({"_id": message["_id"]}, {"$set": update})
+
+    def process_batch(self) -> int:
+        """Send one batch of due messages; returns how many were claimed"""
+        batch = self._claim_batch()
+        sent_ids = []
+        for message in batch:
+            try:
+                self._deliver(message)
+                sent_ids.append(message["_id"])
+            except Exception as e:
+                logger.warning("Error sending email", extra={"message_id": message["_id"], "error": str(e)})
+                if not isinstance(e, smtplib.SMTPRecipientsRefused):
+                    self._close()
+                self._record_failure(message, e)
+        if sent_ids:
+            outbox_collection.update_many(
+                {"_id": {"$in": sent_ids}},
+                {"$set": {"status": "sent", "sent_at": datetime.utcnow()}}
+            )
+        return len(batch)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.clear()
+            try:
+                if self.process_batch():
+                    continue
+            except Exception:
+                logger.exception("Email outbox error")
+                self._close()
+            if self._smtp is not None and time.monotonic() - self._last_used > EMAIL_IDLE_DISCONNECT_SECONDS:
+                self._close()
+            self._wake.wait(EMAIL_POLL_SECONDS)
+
+email_outbox = EmailOutboxWorker()
+
+@app.on_event("startup")
+def provision_indexes():
+    ensure_indexes()
+
+@app.on_event("startup")
+def start_email_outbox():
+    email_outbox.start()
+
+@app.on_event("shutdown")
+def stop_email_outbox():
+    email_outbox.stop()
 
 # API Endpoints
 @app.post("/register", response_model=UserResponse)
-def register(user_data: UserCreate):
+async def register(user_data: UserCreate):
     # Check if user already exists
-    existing_user = users_collection.find_one({"email": user_data.email})
+    existing_user = await run_db(users_collection.find_one, {"email": user_data.email})
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await run_password_job(get_password_hash, user_data.password)
     user_doc = {
         "email": user_data.email,
         "full_name": user_data.full_name,
@@ -222,7 +827,7 @@ def register(user_data: UserCreate):
         "updated_at": datetime.utcnow()
     }
     
-    result = users_collection.insert_one(user_doc)
+    result = await run_db(users_collection.insert_one, user_doc)
     user_doc["id"] = str(result.inserted_id)
     
     # Create default settings
@@ -232,47 +837,49 @@ def register(user_data: UserCreate):
         "notifications": True,
         "language": "en"
     }
-    settings_collection.insert_one(settings_doc)
+    await run_db(settings_collection.insert_one, settings_doc)
     
     # Send welcome email if notifications enabled
     if settings_doc["notifications"]:
-        send_email(
+        await run_db(
+            send_email,
             user_data.email,
             "Welcome to Winova!",
             f"Hello {user_data.full_name or user_data.email},\n\nWelcome to Winova! Your account has been created successfully.\n\nBest regards,\nWinova Team"
         )
     
-    return user_doc
+    return FastJSONResponse(user_response(user_doc))
 
 @app.post("/login", response_model=Token)
-def login(user_data: UserLogin):
+async def login(user_data: UserLogin):
     # Find user
-    user = users_collection.find_one({"email": user_data.email})
-    if not user or not verify_password(user_data.password, user["hashed_password"]):
+    user = await run_db(users_collection.find_one, {"email": user_data.email})
+    if not user or not await run_password_job(verify_password, user_data.password, user["hashed_password"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # Re-hash in the background if BCRYPT_ROUNDS changed since this hash was made
+    if pwd_context.needs_update(user["hashed_password"]):
+        schedule_password_upgrade(user["_id"], user_data.password)
+    
     # Create access token
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": user["email"]}, expires_delta=access_token_expires
     )
     
-    # Convert ObjectId to string for JSON serialization
-    user["id"] = str(user["_id"])
-    
-    return {
+    return FastJSONResponse({
         "access_token": access_token,
         "token_type": "bearer",
-        "user": user
-    }
+        "user": user_response(user)
+    })
 
 @app.get("/profile", response_model=UserResponse)
 def get_profile(current_user: dict = Depends(get_current_user)):
-    return current_user
+    return FastJSONResponse(user_response(current_user))
 
 @app.put("/profile", response_model=UserResponse)
 def update_profile(
@@ -302,8 +909,17 @@ def update_profile(
     # Get updated user
     updated_user = users_collection.find_one({"_id": ObjectId(current_user["id"])})
     updated_user["id"] = str(updated_user["_id"])
+    user_cache.invalidate(current_user["email"], updated_user["email"])
     
-    return updated_user
+    return FastJSONResponse(user_response(updated_user))
+
+@app.get("/cache/stats")
+def cache_stats():
+    return {
+        "user_cache": user_cache.stats(),
+        "dashboard_cache": dashboard_cache.stats(),
+        "compliance_cache": compliance_cache_stats()
+    }
 
 @app.get("/settings")
 def get_settings(current_user: dict = Depends(get_current_user)):
@@ -364,101 +980,989 @@ def update_settings(
     }
 
 import io
+import re
+import csv
+import hashlib
+import multiprocessing
+import zlib
+import numpy as np
 import pandas as pd
-from fastapi import UploadFile, File
-from fastapi.responses import JSONResponse, StreamingResponse
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.jobstores.mongodb import MongoDBJobStore
+from apscheduler.util import datetime_to_utc_timestamp
+from bson.binary import Binary
+from contextlib import contextmanager
+import pickle
+from apscheduler.events import EVENT_JOB_MISSED, EVENT_JOB_SUBMITTED
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.date import DateTrigger
-import threading
-from typing import List, Dict, Any
-import json
-from datetime import timedelta
+import socket
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 
 # Initialize scheduler for proactive alerts
-scheduler = BackgroundScheduler()
-scheduler.start()
+# Jobs live in Mongo so they survive restarts and every worker process shares
+# them. Each process runs a scheduler, but only the holder of the
+# scheduler_leases lease executes jobs; the others stay paused and just
+# write jobs added through their endpoints into the shared store.
+SCHEDULER_LEASE_SECONDS = int(os.getenv("SCHEDULER_LEASE_SECONDS", 30))
+SCHEDULER_MISFIRE_GRACE_SECONDS = int(os.getenv("SCHEDULER_MISFIRE_GRACE_SECONDS", 300))
+SCHEDULER_INSTANCE_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+leases_collection = db.scheduler_leases
+
+class BatchingMongoDBJobStore(MongoDBJobStore):
+    """MongoDBJobStore whose add_job calls can be collected and written with one insert_many"""
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self._batch = threading.local()
+
+    @contextmanager
+    def batch(self):
+        """Buffer jobs added by this thread inside the block and insert them together on exit"""
+        self._batch.documents = []
+        try:
+            yield
+            documents = self._batch.documents
+        finally:
+            self._batch.documents = None
+        if not documents:
+            return
+        try:
+            self.collection.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            duplicates = {error["index"] for error in e.details["writeErrors"] if error["code"] == 11000}
+            if len(duplicates) != len(e.details["writeErrors"]):
+                raise
+            # Existing ids are replaced, as scheduler.add_job(replace_existing=True) would
+            for index in duplicates:
+                document = documents[index]
+                self.collection.update_one({"_id": document["_id"]}, {"$set": {
+                    "next_run_time": document["next_run_time"], "job_state": document["job_state"]
+                }})
+        # The scheduler woke for each add_job before these rows existed; let it see them now
+        scheduler = getattr(self, "_scheduler", None)
+        if scheduler is not None and scheduler.running:
+            scheduler.wakeup()
+
+    def add_job(self, job):
+        documents = getattr(self._batch, "documents", None)
+        if documents is None:
+            return super().add_job(job)
+        documents.append({
+            "_id": job.id,
+            "next_run_time": datetime_to_utc_timestamp(job.next_run_time),
+            "job_state": Binary(pickle.dumps(job.__getstate__(), self.pickle_protocol))
+        })
+
+job_store = BatchingMongoDBJobStore(database=DATABASE_NAME, collection="scheduler_jobs", client=client)
+scheduler = BackgroundScheduler(
+    jobstores={"default": job_store},
+    job_defaults={"coalesce": True, "misfire_grace_time": SCHEDULER_MISFIRE_GRACE_SECONDS},
+)
+
+def record_scheduler_lag(event):
+    job_kind = event.job_id.split("_", 1)[0]
+    if event.code == EVENT_JOB_MISSED:
+        SCHEDULER_JOBS_MISSED.labels(job_kind).inc()
+        return
+    now = datetime.now(timezone.utc)
+    for scheduled_run_time in event.scheduled_run_times:
+        SCHEDULER_JOB_LAG.labels(job_kind).observe(max(0.0, (now - scheduled_run_time).total_seconds()))
+
+scheduler.add_listener(record_scheduler_lag, EVENT_JOB_SUBMITTED | EVENT_JOB_MISSED)
+
+def try_acquire_scheduler_lease() -> bool:
+    """Take or renew the scheduler lease; True while this process holds it"""
+    now = datetime.utcnow()
+    try:
+        lease = leases_collection.find_one_and_update(
+            {"_id": "scheduler", "$or": [{"owner": SCHEDULER_INSTANCE_ID}, {"expires_at": {"$lt": now}}]},
+            {"$set": {"owner": SCHEDULER_INSTANCE_ID, "expires_at": now + timedelta(seconds=SCHEDULER_LEASE_SECONDS)}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        # Another process holds a live lease, so the upsert collided with it
+        return False
+    return lease["owner"] == SCHEDULER_INSTANCE_ID
+
+class SchedulerLeader:
+    """Keeps the lease renewed and runs the scheduler only while this process is leader"""
+
+    def __init__(self):
+        self.is_leader = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        scheduler.start(paused=True)
+        self._thread = threading.Thread(target=self._run, name="scheduler-leader", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+        if self.is_leader:
+            leases_collection.delete_one({"_id": "scheduler", "owner": SCHEDULER_INSTANCE_ID})
+        scheduler.shutdown(wait=False)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                leader = try_acquire_scheduler_lease()
+                if leader and not self.is_leader:
+                    logger.info("Scheduler leadership acquired", extra={"instance_id": SCHEDULER_INSTANCE_ID})
+                    rebuild_scheduled_jobs()
+                    scheduler.resume()
+                elif not leader and self.is_leader:
+                    logger.warning("Scheduler leadership lost", extra={"instance_id": SCHEDULER_INSTANCE_ID})
+                    scheduler.pause()
+                elif leader:
+                    # Pick up jobs other processes wrote to the shared store
+                    scheduler.wakeup()
+                self.is_leader = leader
+            except Exception:
+                logger.exception("Scheduler lease error")
+                if self.is_leader:
+                    scheduler.pause()
+                    self.is_leader = False
+            self._stop.wait(SCHEDULER_LEASE_SECONDS / 3)
+
+scheduler_leader = SchedulerLeader()
+
+@app.on_event("startup")
+def start_scheduler():
+    scheduler_leader.start()
+
+@app.on_event("shutdown")
+def stop_scheduler():
+    scheduler_leader.stop()
+
+@app.on_event("shutdown")
+def stop_analytics_pool():
+    if _analytics_executor is not None:
+        _analytics_executor.shutdown(wait=False, cancel_futures=True)
 
 # Dashboard endpoints
 
-@app.post("/compliance-risk-calculator/analyze")
-async def analyze_compliance(file: UploadFile = File(...)):
-    if not file.filename.endswith('.csv'):
-        raise HTTPException(status_code=400, detail="Only CSV files are supported.")
-    content = await file.read()
-    df = pd.read_csv(io.BytesIO(content))
-    required_cols = {"company_name", "compliance_cost", "penalty_cost"}
-    if not required_cols.issubset(df.columns):
-        raise HTTPException(status_code=400, detail=f"CSV must contain columns: {', '.join(required_cols)}")
+# --- Upload Formats ---
+# Uploads may be CSV, Parquet or Arrow IPC (file or stream format). The format
+# is sniffed from the leading bytes and anything unrecognised is parsed as CSV.
+# Readers only materialise the columns an analyzer needs.
+PARQUET_MAGIC = b"PAR1"
+ARROW_FILE_MAGIC = b"ARROW1"
+ARROW_STREAM_MAGIC = b"\xff\xff\xff\xff"
+
+SUPPORTED_UPLOAD_EXTENSIONS = (".csv", ".parquet", ".arrow", ".feather", ".ipc", ".arrows")
+
+def detect_upload_format(head: bytes) -> str:
+    if head.startswith(PARQUET_MAGIC):
+        return "parquet"
+    if head.startswith(ARROW_FILE_MAGIC):
+        return "arrow_file"
+    if head.startswith(ARROW_STREAM_MAGIC):
+        return "arrow_stream"
+    return "csv"
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise HTTPException(status_code=400, detail="Parquet and Arrow uploads require pyarrow to be installed")
+    return pyarrow
+
+def _wanted_columns(names, columns):
+    return [name for name in names if name in columns] if columns else None
+
+def read_upload_frame(data, columns=None):
+    """Parse a whole upload held in a bytes-like object, reading only columns when given"""
+    data = memoryview(data)
+    upload_format = detect_upload_format(bytes(data[:6]))
+    if upload_format == "csv":
+        usecols = (lambda column: column in columns) if columns else None
+        with io.BufferedReader(_MemoryViewReader(data), buffer_size=1 << 20) as reader:
+            return pd.read_csv(reader, usecols=usecols)
+    pa = _import_pyarrow()
+    buffer = pa.py_buffer(data)
+    if upload_format == "parquet":
+        parquet_file = pa.parquet.ParquetFile(pa.BufferReader(buffer))
+        return parquet_file.read(columns=_wanted_columns(parquet_file.schema_arrow.names, columns)).to_pandas()
+    if upload_format == "arrow_file":
+        table = pa.ipc.open_file(buffer).read_all()
+    else:
+        table = pa.ipc.open_stream(buffer).read_all()
+    # IPC reads from a buffer are zero-copy, so unused columns are never converted
+    if columns:
+        table = table.select(_wanted_columns(table.column_names, columns))
+    return table.to_pandas()
+
+def iter_upload_chunks(fileobj, chunk_rows: int):
+    """Yield an upload as DataFrames of at most chunk_rows rows, without loading it whole"""
+    fileobj.seek(0)
+    upload_format = detect_upload_format(fileobj.read(6))
+    fileobj.seek(0)
+    if upload_format == "csv":
+        yield from pd.read_csv(fileobj, chunksize=chunk_rows)
+        return
+    pa = _import_pyarrow()
+    if upload_format == "parquet":
+        batches = pa.parquet.ParquetFile(fileobj).iter_batches(batch_size=chunk_rows)
+    elif upload_format == "arrow_file":
+        reader = pa.ipc.open_file(fileobj)
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+    else:
+        batches = pa.ipc.open_stream(fileobj)
+    for batch in batches:
+        for start in range(0, batch.num_rows, chunk_rows):
+            yield batch.slice(start, chunk_rows).to_pandas()
+
+# --- CSV Analytics Process Pool ---
+# Parsing and analysing uploads is CPU-bound pandas work, so it runs in a pool
+# of worker processes. The upload bytes go through shared memory rather than
+# being pickled. The segment starts with an 8-byte header: byte 0 is a cancel flag
+# and bytes 4-8 hold the PID of the worker running the job (0 until one picks it
+# up). The upload follows the header.
+ANALYTICS_HEADER_BYTES = 8
+ANALYTICS_WORKERS = int(os.getenv("ANALYTICS_WORKERS", os.cpu_count() or 1))
+ANALYTICS_JOB_TIMEOUT_SECONDS = float(os.getenv("ANALYTICS_JOB_TIMEOUT_SECONDS", 120))
+ANALYTICS_DISCONNECT_POLL_SECONDS = 0.5
+_analytics_executor = None
+_analytics_executor_lock = threading.Lock()
+
+def get_analytics_executor():
+    global _analytics_executor
+    with _analytics_executor_lock:
+        if _analytics_executor is None:
+            _analytics_executor = ProcessPoolExecutor(
+                max_workers=ANALYTICS_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _analytics_executor
+
+def discard_analytics_executor(executor):
+    """Drop a pool whose worker was terminated; the next job starts a fresh one"""
+    global _analytics_executor
+    with _analytics_executor_lock:
+        if _analytics_executor is executor:
+            _analytics_executor = None
+    # Jobs still queued on it fail with BrokenProcessPool and are resubmitted by their callers
+    executor.shutdown(wait=False)
+
+class _MemoryViewReader(io.RawIOBase):
+    """Zero-copy file object over a memoryview, for pd.read_csv"""
+
+    def __init__(self, view):
+        self._view = view
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        count = min(len(buffer), len(self._view) - self._pos)
+        buffer[:count] = self._view[self._pos:self._pos + count]
+        self._pos += count
+        return count
+
+class SharedUpload:
+    """Copies an UploadFile into a shared memory segment for the lifetime of a request"""
 
-    # --- Existing company risk logic ---
-    def calculate_risk(company_name, compliance_cost, penalty_cost):
-        savings = penalty_cost - compliance_cost
-        decision = "Fix Compliance Issue" if compliance_cost < penalty_cost else "Accept Penalty"
+    def __init__(self, file: UploadFile):
+        self.file = file
+        self.shm = None
+        self.size = 0
+
+    def _copy_in(self):
+        source = self.file.file
+        source.seek(0, os.SEEK_END)
+        self.size = source.tell()
+        source.seek(0)
+        self.shm = shared_memory.SharedMemory(create=True, size=self.size + ANALYTICS_HEADER_BYTES)
+        self.shm.buf[:ANALYTICS_HEADER_BYTES] = bytes(ANALYTICS_HEADER_BYTES)
+        position = ANALYTICS_HEADER_BYTES
+        while chunk := source.read(1 << 20):
+            self.shm.buf[position:position + len(chunk)] = chunk
+            position += len(chunk)
+
+    def sha256(self) -> str:
+        return hashlib.sha256(self.shm.buf[ANALYTICS_HEADER_BYTES:ANALYTICS_HEADER_BYTES + self.size]).hexdigest()
+
+    def cancel(self):
+        self.shm.buf[0] = 1
+
+    def reset(self):
+        self.shm.buf[:ANALYTICS_HEADER_BYTES] = bytes(ANALYTICS_HEADER_BYTES)
+
+    def worker_pid(self) -> int:
+        """PID of the worker running this upload's job, or 0 while it is still queued"""
+        return struct.unpack_from("<I", self.shm.buf, 4)[0]
+
+    async def __aenter__(self):
+        await run_in_threadpool(self._copy_in)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.shm.close()
+        self.shm.unlink()
+
+def _run_analytics_worker(func, shm_name: str, size: int, columns=None):
+    """Pool entry point: parse the shared upload and apply func to the DataFrame"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    struct.pack_into("<I", shm.buf, 4, os.getpid())
+    view = shm.buf[ANALYTICS_HEADER_BYTES:ANALYTICS_HEADER_BYTES + size]
+    upload_format = detect_upload_format(bytes(view[:6]))
+    try:
+        started = time.perf_counter()
+        df = read_upload_frame(view, columns)
+        # Metrics live in the request process, so parse stats travel back with the result
+        parse_stats = (upload_format, time.perf_counter() - started, len(df))
+        if shm.buf[0]:
+            return "cancelled", None, parse_stats
+        result = func(df)
+        del df
+        return "ok", result, parse_stats
+    except HTTPException as e:
+        # HTTPException does not survive pickling, so send its parts back
+        return "http_error", (e.status_code, e.detail), None
+    finally:
+        try:
+            view.release()
+            shm.close()
+        except BufferError:
+            # An Arrow buffer still references the mapping; it is freed with the process
+            pass
+
+def abort_analytics_job(executor, future, upload: SharedUpload):
+    """Stop a job: drop it from the queue, or terminate the worker already running it"""
+    upload.cancel()
+    if future.cancel():
+        return
+    pid = upload.worker_pid()
+    if pid and not future.done():
+        # pandas cannot be interrupted mid-parse, so the worker is killed rather than left
+        # busy, and the pool (broken by the kill) is replaced
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+        discard_analytics_executor(executor)
+
+async def _await_analytics_job(request: Request, executor, func, upload: SharedUpload, columns):
+    loop = asyncio.get_running_loop()
+    upload.reset()
+    future = executor.submit(_run_analytics_worker, func, upload.shm.name, upload.size, columns)
+    waiter = asyncio.wrap_future(future)
+    # The timeout covers running time only, not time queued behind other jobs
+    deadline = None
+    while not waiter.done():
+        await asyncio.wait({waiter}, timeout=ANALYTICS_DISCONNECT_POLL_SECONDS)
+        if waiter.done():
+            break
+        if deadline is None and upload.worker_pid():
+            deadline = loop.time() + ANALYTICS_JOB_TIMEOUT_SECONDS
+        if await request.is_disconnected():
+            abort_analytics_job(executor, future, upload)
+            waiter.cancel()
+            raise HTTPException(status_code=499, detail="Client disconnected")
+        if deadline is not None and loop.time() > deadline:
+            abort_analytics_job(executor, future, upload)
+            waiter.cancel()
+            raise HTTPException(status_code=504, detail="Analysis timed out")
+    return waiter.result()
+
+async def run_analytics_job(request: Request, func, upload: SharedUpload, columns=None):
+    """Run func over a shared upload in the process pool, honouring timeout and client disconnects"""
+    for attempt in range(2):
+        executor = get_analytics_executor()
+        try:
+            outcome, value, parse_stats = await _await_analytics_job(request, executor, func, upload, columns)
+            break
+        except BrokenProcessPool:
+            # Terminating another job's worker breaks the whole pool; rerun once on a fresh one
+            discard_analytics_executor(executor)
+            if attempt:
+                raise HTTPException(status_code=503, detail="Analysis workers restarted, please retry")
+    if parse_stats:
+        observe_upload_parse(func.__name__, *parse_stats)
+    if outcome == "http_error":
+        raise HTTPException(status_code=value[0], detail=value[1])
+    return value
+
+# --- Compliance Risk Engine ---
+# Each entry is a full list of per-row dicts, so the cache is bounded by the total rows
+# it holds (roughly 0.5 KB each) as well as by entry count
+COMPLIANCE_CACHE_SIZE = int(os.getenv("COMPLIANCE_CACHE_SIZE", 32))
+COMPLIANCE_CACHE_MAX_ROWS = int(os.getenv("COMPLIANCE_CACHE_MAX_ROWS", 200000))
+_compliance_cache = OrderedDict()
+_compliance_cache_rows = 0
+_compliance_cache_lock = threading.Lock()
+
+def cache_compliance_risks(key: str, prioritized: list):
+    """Store a result, evicting least recently used entries until both budgets are met"""
+    global _compliance_cache_rows
+    if len(prioritized) > COMPLIANCE_CACHE_MAX_ROWS:
+        return
+    with _compliance_cache_lock:
+        previous = _compliance_cache.pop(key, None)
+        if previous is not None:
+            _compliance_cache_rows -= len(previous)
+        _compliance_cache[key] = prioritized
+        _compliance_cache_rows += len(prioritized)
+        while len(_compliance_cache) > COMPLIANCE_CACHE_SIZE or _compliance_cache_rows > COMPLIANCE_CACHE_MAX_ROWS:
+            _, evicted = _compliance_cache.popitem(last=False)
+            _compliance_cache_rows -= len(evicted)
+
+def compliance_cache_stats() -> dict:
+    with _compliance_cache_lock:
         return {
-            "company": company_name,
-            "compliance_cost": compliance_cost,
-            "penalty_cost": penalty_cost,
-            "savings_if_fixed": savings,
-            "recommended_action": decision
+            "size": len(_compliance_cache),
+            "maxsize": COMPLIANCE_CACHE_SIZE,
+            "rows": _compliance_cache_rows,
+            "max_rows": COMPLIANCE_CACHE_MAX_ROWS
         }
-    def prioritize_by_impact(risks):
-        return sorted(risks, key=lambda x: x['savings_if_fixed'], reverse=True)
-    risk_reports = [
-        calculate_risk(row['company_name'], row['compliance_cost'], row['penalty_cost'])
-        for _, row in df.iterrows()
-    ]
-    prioritized = prioritize_by_impact(risk_reports)
 
-    return JSONResponse(content={
+COMPLIANCE_COLUMNS = {"company_name", "compliance_cost", "penalty_cost"}
+
+def calculate_compliance_risks(df):
+    """Compute savings and recommended action for every row and prioritize by impact"""
+    required_cols = COMPLIANCE_COLUMNS
+    if not required_cols.issubset(df.columns):
+        raise HTTPException(status_code=400, detail=f"CSV must contain columns: {', '.join(required_cols)}")
+    compliance_cost = df["compliance_cost"]
+    penalty_cost = df["penalty_cost"]
+    risks = pd.DataFrame({
+        "company": df["company_name"].values,
+        "compliance_cost": compliance_cost.values,
+        "penalty_cost": penalty_cost.values,
+        "savings_if_fixed": (penalty_cost - compliance_cost).values,
+        "recommended_action": np.where(compliance_cost < penalty_cost, "Fix Compliance Issue", "Accept Penalty"),
+    })
+    return risks.sort_values("savings_if_fixed", ascending=False, kind="stable").to_dict("records")
+
+async def get_compliance_risks(request: Request, file: UploadFile):
+    """Return prioritized risks for an uploaded CSV, cached by content hash"""
+    async with SharedUpload(file) as upload:
+        key = upload.sha256()
+        with _compliance_cache_lock:
+            if key in _compliance_cache:
+                _compliance_cache.move_to_end(key)
+                return _compliance_cache[key]
+        prioritized = await run_analytics_job(request, calculate_compliance_risks, upload, COMPLIANCE_COLUMNS)
+    cache_compliance_risks(key, prioritized)
+    return prioritized
+
+@app.post("/compliance-risk-calculator/analyze")
+async def analyze_compliance(request: Request, file: UploadFile = File(...)):
+    if not file.filename.lower().endswith(SUPPORTED_UPLOAD_EXTENSIONS):
+        raise HTTPException(status_code=400, detail="Only CSV, Parquet and Arrow files are supported.")
+    prioritized = await get_compliance_risks(request, file)
+
+    return FastJSONResponse({
         "results": prioritized
     })
 
+COMPLIANCE_REPORT_FIELDS = ["company", "compliance_cost", "penalty_cost", "savings_if_fixed", "recommended_action"]
+DOWNLOAD_BATCH_ROWS = int(os.getenv("DOWNLOAD_BATCH_ROWS", 5000))
+
+def accepts_gzip(request: Request) -> bool:
+    for coding in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = coding.strip().partition(";")
+        if name.strip().lower() in ("gzip", "*"):
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+def _csv_cell(value):
+    return "" if isinstance(value, float) and value != value else value
+
+def iter_csv_batches(rows, fields, batch_rows: int = DOWNLOAD_BATCH_ROWS, compress: bool = False):
+    """Yield rows as CSV text (or gzip bytes), one batch at a time"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    compressor = zlib.compressobj(wbits=31) if compress else None
+
+    def flush():
+        chunk = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return compressor.compress(chunk.encode("utf-8")) if compressor else chunk
+
+    writer.writerow(fields)
+    for start in range(0, len(rows), batch_rows):
+        for row in rows[start:start + batch_rows]:
+            writer.writerow([_csv_cell(row.get(field)) for field in fields])
+        chunk = flush()
+        if chunk:
+            yield chunk
+    chunk = flush()
+    if compressor:
+        chunk += compressor.flush()
+    if chunk:
+        yield chunk
+
 @app.post("/compliance-risk-calculator/download")
-async def download_compliance_report(file: UploadFile = File(...)):
-    content = await file.read()
-    df = pd.read_csv(io.BytesIO(content))
-    required_cols = {"company_name", "compliance_cost", "penalty_cost"}
-    if not required_cols.issubset(df.columns):
-        raise HTTPException(status_code=400, detail=f"CSV must contain columns: {', '.join(required_cols)}")
-    def calculate_risk(company_name, compliance_cost, penalty_cost):
-        savings = penalty_cost - compliance_cost
-        decision = "Fix Compliance Issue" if compliance_cost < penalty_cost else "Accept Penalty"
-        return {
-            "company": company_name,
-            "compliance_cost": compliance_cost,
-            "penalty_cost": penalty_cost,
-            "savings_if_fixed": savings,
-            "recommended_action": decision
-        }
-    def prioritize_by_impact(risks):
-        return sorted(risks, key=lambda x: x['savings_if_fixed'], reverse=True)
-    risk_reports = [
-        calculate_risk(row['company_name'], row['compliance_cost'], row['penalty_cost'])
-        for _, row in df.iterrows()
-    ]
-    prioritized = prioritize_by_impact(risk_reports)
-    result_df = pd.DataFrame(prioritized)
-    stream = io.StringIO()
-    result_df.to_csv(stream, index=False)
+async def download_compliance_report(
+    request: Request,
+    file: UploadFile = File(...),
+    limit: Optional[int] = None
+):
+    prioritized = await get_compliance_risks(request, file)
+    # Results are sorted by savings, so the top N are a prefix
+    rows = prioritized[:limit] if limit is not None and limit >= 0 else prioritized
+    compress = accepts_gzip(request)
     response = StreamingResponse(
-        iter([stream.getvalue()]),
+        iter_csv_batches(rows, COMPLIANCE_REPORT_FIELDS, compress=compress),
         media_type="text/csv"
     )
     response.headers["Content-Disposition"] = "attachment; filename=compliance_risk_output.csv"
+    response.headers["Vary"] = "Accept-Encoding"
+    if compress:
+        response.headers["Content-Encoding"] = "gzip"
     return response
-@app.get("/dashboard")
-def dashboard():
+
+# Industry reference data (public/expanded_compliance_data.csv), held in memory as typed columns
+REFERENCE_DATA_CSV = os.getenv(
+    "REFERENCE_DATA_CSV",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "public", "expanded_compliance_data.csv")
+)
+REFERENCE_RELOAD_CHECK_SECONDS = float(os.getenv("REFERENCE_RELOAD_CHECK_SECONDS", 5))
+REFERENCE_DTYPES = {
+    "Industry": "category",
+    "Revenue": "float32",
+    "Emissions": "float32",
+    "NumFacilities": "int16",
+    "CO2ReductionTarget": "int16",
+    "Timeline": "int16",
+    "StrictnessLevel": "int16",
+    "ComplianceCost": "float32",
+}
+REFERENCE_INDEXED_COLUMNS = ("Industry", "StrictnessLevel")
+REFERENCE_GROUP_COLUMNS = {"Industry", "Timeline", "StrictnessLevel", "NumFacilities", "CO2ReductionTarget"}
+REFERENCE_METRIC_COLUMNS = {"Revenue", "Emissions", "ComplianceCost", "CO2ReductionTarget", "NumFacilities"}
+
+class ReferenceSnapshot:
+    """One immutable load of the reference file: the frame, its indexes and derived results"""
+
+    def __init__(self, frame, mtime: float, size: int):
+        self.frame = frame
+        self.mtime = mtime
+        self.size = size
+        self.loaded_at = datetime.utcnow()
+        # column -> {value: sorted row positions}
+        self.indexes = {
+            column: {value: positions.astype(np.int32) for value, positions in frame.groupby(column, observed=True).indices.items()}
+            for column in REFERENCE_INDEXED_COLUMNS
+        }
+        self.derived = {}
+
+    def rows_matching(self, filters: dict):
+        """Boolean row mask satisfying every {column: [values]} filter, built from the indexes"""
+        mask = np.ones(len(self.frame), dtype=bool)
+        for column, values in filters.items():
+            index = self.indexes[column]
+            matched = np.zeros(len(self.frame), dtype=bool)
+            for value in values:
+                if value in index:
+                    matched[index[value]] = True
+            mask &= matched
+        return mask
+
+    def memory_bytes(self) -> int:
+        index_bytes = sum(positions.nbytes for index in self.indexes.values() for positions in index.values())
+        return int(self.frame.memory_usage(deep=True).sum()) + index_bytes
+
+class ReferenceDataset:
+    """Loads the reference CSV once and swaps in a fresh snapshot whenever the file changes"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._snapshot = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    def _load(self, stat) -> ReferenceSnapshot:
+        frame = pd.read_csv(self.path, usecols=list(REFERENCE_DTYPES), dtype=REFERENCE_DTYPES)
+        snapshot = ReferenceSnapshot(frame, stat.st_mtime, stat.st_size)
+        logger.info("Reference data loaded", extra={"path": self.path, "rows": len(frame), "bytes": snapshot.memory_bytes()})
+        return snapshot
+
+    def snapshot(self) -> ReferenceSnapshot:
+        current = self._snapshot
+        if current is not None and time.monotonic() - self._last_check < REFERENCE_RELOAD_CHECK_SECONDS:
+            return current
+        with self._lock:
+            if self._snapshot is not current:
+                return self._snapshot
+            self._last_check = time.monotonic()
+            try:
+                stat = os.stat(self.path)
+                if current is None or (stat.st_mtime, stat.st_size) != (current.mtime, current.size):
+                    self._snapshot = self._load(stat)
+            except Exception:
+                if current is None:
+                    raise
+                # Keep serving the last good load if the file is missing, mid-write or malformed
+                logger.exception("Reference data reload failed")
+            return self._snapshot
+
+    def derive(self, key: str, func):
+        """Compute func(frame) once per snapshot"""
+        snapshot = self.snapshot()
+        if key not in snapshot.derived:
+            snapshot.derived[key] = func(snapshot.frame)
+        return snapshot.derived[key]
+
+reference_dataset = ReferenceDataset(REFERENCE_DATA_CSV)
+
+@app.on_event("startup")
+def load_reference_dataset():
+    reference_dataset.snapshot()
+
+def _split_param(value: Optional[str]) -> List[str]:
+    return [part.strip() for part in value.split(",") if part.strip()] if value else []
+
+def _group_codes(column):
+    """Dense integer codes and their labels for a categorical or small-integer column"""
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return column.cat.codes.to_numpy(), column.cat.categories.tolist()
+    values = column.to_numpy()
+    low = int(values.min()) if len(values) else 0
+    high = int(values.max()) if len(values) else 0
+    return (values - low).astype(np.int64), list(range(low, high + 1))
+
+def query_reference_data(snapshot: ReferenceSnapshot, filters: dict, group_by: List[str], metric: str, percentiles: List[float]):
+    """Count, mean and linearly interpolated percentiles of metric per group"""
+    frame = snapshot.frame
+    # Rows in metric order (sorted once per snapshot); a stable sort by group below keeps
+    # each group's run sorted by value, so percentiles are direct lookups
+    order = snapshot.derived.get(f"order:{metric}")
+    if order is None:
+        order = snapshot.derived[f"order:{metric}"] = np.argsort(frame[metric].to_numpy(), kind="stable")
+    if filters:
+        order = order[snapshot.rows_matching(filters)[order]]
+    if not len(order):
+        return [] if group_by else [{"count": 0, "mean": None, **{f"p{q:g}": None for q in percentiles}}]
+    labels, codes = [], []
+    for column in group_by:
+        column_codes, column_labels = _group_codes(frame[column])
+        labels.append(column_labels)
+        codes.append(column_codes[order])
+    shape = [len(column_labels) for column_labels in labels]
+    key = np.ravel_multi_index(codes, shape) if group_by else np.zeros(len(order), dtype=np.int64)
+    if int(np.prod(shape)) <= np.iinfo(np.uint16).max:
+        key = key.astype(np.uint16)  # lets numpy use a radix sort
+    regroup = np.argsort(key, kind="stable")
+    key = key[regroup]
+    values = frame[metric].to_numpy()[order[regroup]].astype(np.float64)
+    starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+    counts = np.diff(np.r_[starts, len(values)])
+    columns = {"count": counts, "mean": (np.add.reduceat(values, starts) / counts).round(4)}
+    for q in percentiles:
+        rank = starts + (counts - 1) * (q / 100)
+        low = np.floor(rank).astype(np.int64)
+        high = np.minimum(low + 1, starts + counts - 1)
+        columns[f"p{q:g}"] = (values[low] + (values[high] - values[low]) * (rank - low)).round(4)
+    group_codes = np.unravel_index(key[starts].astype(np.int64), shape) if group_by else []
+    results = []
+    for row in range(len(starts)):
+        entry = {column: labels[i][group_codes[i][row]] for i, column in enumerate(group_by)}
+        entry.update({name: column[row].item() for name, column in columns.items()})
+        results.append(entry)
+    return results
+
+@app.get("/reference-data/query")
+async def get_reference_data_aggregates(
+    industry: Optional[str] = None,
+    strictness: Optional[str] = None,
+    group_by: str = "Industry,Timeline",
+    metric: str = "ComplianceCost",
+    percentiles: str = "50,90"
+):
+    """Aggregate the reference dataset: count, mean and percentiles of a metric per group"""
+    groups = _split_param(group_by)
+    unknown = set(groups) - REFERENCE_GROUP_COLUMNS
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Cannot group by: {', '.join(sorted(unknown))}")
+    if metric not in REFERENCE_METRIC_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"metric must be one of: {', '.join(sorted(REFERENCE_METRIC_COLUMNS))}")
+    try:
+        quantiles = [float(q) for q in _split_param(percentiles)]
+        strictness_levels = [int(level) for level in _split_param(strictness)]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="percentiles and strictness must be numeric")
+    if any(not 0 <= q <= 100 for q in quantiles):
+        raise HTTPException(status_code=400, detail="percentiles must be between 0 and 100")
+    filters = {}
+    if industry:
+        filters["Industry"] = _split_param(industry)
+    if strictness_levels:
+        filters["StrictnessLevel"] = strictness_levels
+    snapshot = await run_in_threadpool(reference_dataset.snapshot)
+    results = await run_in_threadpool(query_reference_data, snapshot, filters, groups, metric, quantiles)
     return {
-        "summary": "Dashboard data",
-        "stats": {
-            "users": 150,
-            "alerts": 3,
-            "compliance": "Good",
-            "carbon_footprint": 12345
+        "group_by": groups,
+        "metric": metric,
+        "filters": filters,
+        "loaded_at": snapshot.loaded_at,
+        "results": results,
+    }
+
+@app.get("/reference-data/stats")
+async def get_reference_data_stats():
+    snapshot = await run_in_threadpool(reference_dataset.snapshot)
+    return {
+        "path": reference_dataset.path,
+        "rows": len(snapshot.frame),
+        "memory_bytes": snapshot.memory_bytes(),
+        "loaded_at": snapshot.loaded_at,
+        "industries": list(snapshot.frame["Industry"].cat.categories),
+        "strictness_levels": sorted(int(level) for level in snapshot.indexes["StrictnessLevel"]),
+    }
+
+# What-if scenario grid: the calculator's per-company cost model evaluated for every
+# (strictness, timeline) pair over a whole dataset
+WHAT_IF_COLUMNS = {"Industry", "Revenue", "Emissions", "NumFacilities"}
+WHAT_IF_MAX_GRID_POINTS = int(os.getenv("WHAT_IF_MAX_GRID_POINTS", 10000))
+STRICTNESS_MULTIPLIERS = {"Low": 1.0, "Medium": 1.5, "High": 2.0, "Very High": 2.5}
+DEFAULT_WHAT_IF_TIMELINES = "1,2,3,4,5,6,7,8,9,10"
+
+def summarize_what_if_frame(df):
+    """Per-industry sums of the strictness-scaled and fixed parts of the cost model"""
+    if not WHAT_IF_COLUMNS.issubset(df.columns):
+        raise HTTPException(status_code=400, detail=f"CSV must contain columns: {', '.join(WHAT_IF_COLUMNS)}")
+    # predictedCost = (revenue * 0.15 * strictness + emissions / 1000 * 0.8 + facilities * 2.5) * timelineFactor
+    # is linear in each row, so summing both terms per industry once reduces every grid cell to O(industries)
+    codes, industries = pd.factorize(df["Industry"].astype(str), sort=True)
+    scaled = pd.to_numeric(df["Revenue"], errors="coerce").fillna(0).to_numpy() * 0.15
+    fixed = (
+        pd.to_numeric(df["Emissions"], errors="coerce").fillna(0).to_numpy() / 1000 * 0.8
+        + pd.to_numeric(df["NumFacilities"], errors="coerce").fillna(0).to_numpy() * 2.5
+    )
+    valid = codes >= 0
+    codes, scaled, fixed = codes[valid], scaled[valid], fixed[valid]
+    return {
+        "industries": list(industries),
+        "companies": np.bincount(codes, minlength=len(industries)).tolist(),
+        "scaled": np.bincount(codes, weights=scaled, minlength=len(industries)).tolist(),
+        "fixed": np.bincount(codes, weights=fixed, minlength=len(industries)).tolist(),
+    }
+
+def reference_what_if_summary():
+    return reference_dataset.derive("what_if", summarize_what_if_frame)
+
+def parse_strictness_levels(value: str):
+    """Accept calculator level names or raw multipliers, e.g. Low,High or 1,1.25,1.5"""
+    labels, multipliers = [], []
+    for item in (part.strip() for part in value.split(",")):
+        if not item:
+            continue
+        multiplier = STRICTNESS_MULTIPLIERS.get(item)
+        if multiplier is None:
+            try:
+                multiplier = float(item)
+            except ValueError:
+                raise HTTPException(status_code=400, detail=f"Unknown strictness level: {item}")
+        if not multiplier > 0:
+            raise HTTPException(status_code=400, detail="Strictness multipliers must be positive")
+        labels.append(item)
+        multipliers.append(multiplier)
+    return labels, np.array(multipliers)
+
+def parse_timelines(value: str):
+    try:
+        timelines = np.array([float(part) for part in value.split(",") if part.strip()])
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Timelines must be numbers of years")
+    if (timelines <= 0).any():
+        raise HTTPException(status_code=400, detail="Timelines must be positive")
+    return timelines
+
+def evaluate_what_if_grid(summary: dict, multipliers, timelines) -> dict:
+    """Cost surfaces (strictness x timeline) per industry and in total"""
+    timeline_factor = np.where(timelines < 3, 1.4, np.where(timelines > 7, 0.8, 1.0))
+    scaled = np.array(summary["scaled"])[:, None, None]
+    fixed = np.array(summary["fixed"])[:, None, None]
+    companies = np.array(summary["companies"])
+    # (industry, strictness, timeline)
+    surfaces = (scaled * multipliers[None, :, None] + fixed) * timeline_factor[None, None, :]
+    averages = surfaces / np.maximum(companies, 1)[:, None, None]
+    risk_score = multipliers[:, None] * np.where(timelines < 3, 2, 1)[None, :]
+    risk_levels = np.where(risk_score > 3, "High", np.where(risk_score > 2, "Medium", "Low"))
+    return {
+        "total_cost": surfaces.sum(axis=0).round(2).tolist(),
+        "risk_levels": risk_levels.tolist(),
+        "industries": {
+            industry: {
+                "companies": int(companies[index]),
+                "total_cost": surfaces[index].round(2).tolist(),
+                "average_cost": averages[index].round(2).tolist(),
+            }
+            for index, industry in enumerate(summary["industries"])
+        },
+    }
+
+@app.post("/what-if-calculator/grid")
+async def what_if_grid(
+    request: Request,
+    strictness: str = ",".join(STRICTNESS_MULTIPLIERS),
+    timelines: str = DEFAULT_WHAT_IF_TIMELINES,
+    file: Optional[UploadFile] = File(None)
+):
+    """Evaluate every strictness x timeline scenario over the reference dataset or an upload"""
+    labels, multipliers = parse_strictness_levels(strictness)
+    timeline_values = parse_timelines(timelines)
+    if not len(multipliers) or not len(timeline_values):
+        raise HTTPException(status_code=400, detail="At least one strictness level and one timeline are required")
+    if len(multipliers) * len(timeline_values) > WHAT_IF_MAX_GRID_POINTS:
+        raise HTTPException(status_code=400, detail=f"Grid exceeds {WHAT_IF_MAX_GRID_POINTS} scenarios")
+    if file is not None:
+        async with SharedUpload(file) as upload:
+            summary = await run_analytics_job(request, summarize_what_if_frame, upload, WHAT_IF_COLUMNS)
+    else:
+        summary = await run_in_threadpool(reference_what_if_summary)
+    return {
+        "strictness": labels,
+        "multipliers": multipliers.tolist(),
+        "timelines": timeline_values.tolist(),
+        "rows": int(sum(summary["companies"])),
+        **evaluate_what_if_grid(summary, multipliers, timeline_values),
+    }
+
+# Per-user overview behind /dashboard, /carbon-analysis and /regulatory-scanner. It is
+# computed once per user, cached, and dropped whenever the user uploads data or an alert fires
+DASHBOARD_CACHE_TTL_SECONDS = float(os.getenv("DASHBOARD_CACHE_TTL_SECONDS", 60))
+DASHBOARD_CACHE_SIZE = int(os.getenv("DASHBOARD_CACHE_SIZE", 1024))
+dashboard_cache = TTLCache(DASHBOARD_CACHE_SIZE, DASHBOARD_CACHE_TTL_SECONDS)
+RECENT_ALERTS_LIMIT = 5
+
+def invalidate_user_overview(user_id: Optional[str]):
+    if user_id:
+        dashboard_cache.invalidate(user_id)
+
+def build_user_overview(user_id: str) -> dict:
+    """Alert counts, upload totals, per-industry and monthly emissions for one user"""
+    alerts = {"total": 0, "active": 0, "unread": 0, "by_priority": {}}
+    for group in db.proactive_alerts.aggregate([
+        {"$match": {"user_id": user_id}},
+        {"$group": {
+            "_id": {"priority": "$priority", "status": "$status"},
+            "count": {"$sum": 1},
+            "unread": {"$sum": {"$cond": [{"$eq": ["$read", False]}, 1, 0]}}
+        }}
+    ]):
+        priority, alert_status = group["_id"].get("priority") or "medium", group["_id"].get("status")
+        alerts["total"] += group["count"]
+        alerts["unread"] += group["unread"]
+        if alert_status == "active":
+            alerts["active"] += group["count"]
+            alerts["by_priority"][priority] = alerts["by_priority"].get(priority, 0) + group["count"]
+    recent_alerts = [
+        {"id": str(alert.pop("_id")), **alert}
+        for alert in db.proactive_alerts.find(
+            {"user_id": user_id},
+            {"title": 1, "priority": 1, "status": 1, "triggered_at": 1}
+        ).sort("triggered_at", -1).limit(RECENT_ALERTS_LIMIT)
+    ]
+    stats = get_regulatory_stats(user_id) or {}
+    industries = [
+        {
+            "industry": industry,
+            "record_count": values.get("record_count", 0),
+            "emissions": round(values.get("emissions", 0.0), 2),
+            "compliance_cost": round(values.get("compliance_cost", 0.0), 2),
         }
+        for industry, values in sorted(stats.get("industries", {}).items())
+    ]
+    monthly = [
+        {"month": month, "emissions": round(values.get("emissions", 0.0), 2), "records": values.get("record_count", 0)}
+        for month, values in sorted(stats.get("monthly", {}).items())
+    ]
+    return {
+        "alerts": alerts,
+        "recent_alerts": recent_alerts,
+        "upload_count": stats.get("upload_count", 0),
+        "record_count": stats.get("record_count", 0),
+        "last_upload_at": stats.get("last_upload_at"),
+        "total_emissions": round(sum(industry["emissions"] for industry in industries), 2),
+        "industries": industries,
+        "monthly": monthly,
     }
 
+async def get_user_overview(user_id: str):
+    """Return (etag, overview), recomputing only after invalidation or TTL expiry"""
+    cached = dashboard_cache.get(user_id)
+    if cached is None:
+        overview = await run_db(build_user_overview, user_id)
+        # Content-derived, so a recompute of unchanged data keeps the same tag
+        digest = hashlib.sha1(orjson.dumps(overview, default=_orjson_default, option=ORJSON_OPTIONS | orjson.OPT_SORT_KEYS)).hexdigest()[:20]
+        cached = (digest, overview)
+        dashboard_cache.set(user_id, cached)
+    return cached
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in candidates or etag in candidates
+
+async def serve_user_view(request: Request, user_id: str, view: str, render):
+    """Render a view of the user's overview, answering 304 when the client's copy is current"""
+    digest, overview = await get_user_overview(user_id)
+    etag = f'"{view}-{digest}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return FastJSONResponse(render(overview), headers=headers)
+
+def compliance_status(overview: dict) -> str:
+    if not overview["upload_count"] and not overview["alerts"]["total"]:
+        return "No Data"
+    if overview["alerts"]["by_priority"].get("high") or overview["alerts"]["by_priority"].get("critical"):
+        return "Attention Required"
+    return "Good"
+
+def emissions_trend(monthly: list) -> str:
+    if len(monthly) < 2:
+        return "insufficient data"
+    previous, latest = monthly[-2]["emissions"], monthly[-1]["emissions"]
+    if latest < previous * 0.98:
+        return "decreasing"
+    if latest > previous * 1.02:
+        return "increasing"
+    return "stable"
+
+TREND_RECOMMENDATIONS = {
+    "decreasing": "Continue current strategy",
+    "increasing": "Review emission sources in the latest uploads",
+    "stable": "Look for further reduction opportunities",
+    "insufficient data": "Upload data for more months to track the trend",
+}
+
+@app.get("/dashboard")
+async def dashboard(request: Request, current_user: dict = Depends(get_current_user)):
+    def render(overview):
+        return {
+            "summary": "Dashboard data",
+            "stats": {
+                "alerts": overview["alerts"]["active"],
+                "unread_alerts": overview["alerts"]["unread"],
+                "uploads": overview["upload_count"],
+                "records": overview["record_count"],
+                "compliance": compliance_status(overview),
+                "carbon_footprint": overview["total_emissions"]
+            },
+            "recent_alerts": overview["recent_alerts"]
+        }
+    return await serve_user_view(request, current_user["id"], "dashboard", render)
+
 @app.get("/compliance-alerts")
 def compliance_alerts():
     return {
@@ -469,57 +1973,157 @@ def compliance_alerts():
     }
 
 # Proactive Alert System Functions
-def trigger_proactive_alert(alert_data: dict):
+# Alerts firing for the same user within ALERT_COALESCE_SECONDS are stored with one
+# insert_many and announced in one digest email (0 disables coalescing)
+ALERT_COALESCE_SECONDS = float(os.getenv("ALERT_COALESCE_SECONDS", 30))
+ALERT_CRITICAL_BYPASS = os.getenv("ALERT_CRITICAL_BYPASS", "true").lower() == "true"
+ALERT_PRIORITY_ORDER = {"critical": 0, "high": 1, "medium": 2, "low": 3}
+
+def build_alert_document(alert_data: dict) -> dict:
+    return {
+        "user_id": alert_data.get("user_id"),
+        "alert_type": alert_data.get("alert_type"),
+        "title": alert_data.get("title"),
+        "description": alert_data.get("description"),
+        "priority": alert_data.get("priority", "medium"),
+        "triggered_at": datetime.utcnow(),
+        "status": "active",
+        "read": False
+    }
+
+def send_alert_email(user_email: str, alerts: List[dict]):
+    """One email for a single alert, or a digest ordered by priority then firing time"""
+    if len(alerts) == 1:
+        alert = alerts[0]
+        send_email(
+            user_email,
+            f"Proactive Alert: {alert['title']}",
+            f"Alert Details:\n\n{alert['description']}\n\nPriority: {alert['priority'].upper()}\n\nTriggered at: {alert['triggered_at'].strftime('%Y-%m-%d %H:%M:%S')} UTC"
+        )
+        return
+    alerts = sorted(alerts, key=lambda alert: (ALERT_PRIORITY_ORDER.get(alert["priority"], len(ALERT_PRIORITY_ORDER)), alert["triggered_at"]))
+    sections = [
+        f"[{alert['priority'].upper()}] {alert['title']}\n{alert['description']}\nTriggered at: {alert['triggered_at'].strftime('%Y-%m-%d %H:%M:%S')} UTC"
+        for alert in alerts
+    ]
+    send_email(
+        user_email,
+        f"Proactive Alerts: {len(alerts)} new alerts ({alerts[0]['priority']} priority first)",
+        f"You have {len(alerts)} new alerts:\n\n" + "\n\n".join(sections)
+    )
+
+def store_alerts(alerts: List[dict], user_email: Optional[str]):
+    """Insert alerts for one user with a single write and announce them with a single email"""
+    if len(alerts) == 1:
+        db.proactive_alerts.insert_one(alerts[0])
+    else:
+        db.proactive_alerts.insert_many(alerts, ordered=False)
+    invalidate_user_overview(alerts[0]["user_id"])
+    logger.debug("Alerts stored", extra={"user_id": alerts[0]["user_id"], "count": len(alerts)})
+    if user_email:
+        send_alert_email(user_email, alerts)
+        logger.debug("Email notification queued", extra={"to": user_email, "alerts": len(alerts)})
+
+class AlertCoalescer:
+    """Buffers each user's alerts for a window after the first one fires, then flushes them together"""
+
+    def __init__(self, window: float):
+        self.window = window
+        # user_id -> {"deadline": monotonic time, "email": address or None, "alerts": [...]}
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="alert-coalescer", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+        self.flush(force=True)
+
+    def add(self, alert: dict, user_email: Optional[str]):
+        with self._lock:
+            batch = self._pending.get(alert["user_id"])
+            if batch is None:
+                batch = self._pending[alert["user_id"]] = {"deadline": time.monotonic() + self.window, "email": None, "alerts": []}
+                self._wake.set()
+            batch["alerts"].append(alert)
+            batch["email"] = batch["email"] or user_email
+
+    def flush(self, force: bool = False) -> float:
+        """Write out every batch whose window has closed; return seconds until the next one closes"""
+        now = time.monotonic()
+        with self._lock:
+            due = [user_id for user_id, batch in self._pending.items() if force or batch["deadline"] <= now]
+            batches = [self._pending.pop(user_id) for user_id in due]
+            next_deadline = min((batch["deadline"] for batch in self._pending.values()), default=None)
+        for batch in batches:
+            try:
+                store_alerts(batch["alerts"], batch["email"])
+            except Exception:
+                logger.exception("Error flushing coalesced alerts", extra={"alerts": len(batch["alerts"])})
+        return self.window if next_deadline is None else max(0.0, next_deadline - now)
+
+    def flush_user(self, user_id: str):
+        """Write out one user's batch now, whatever its deadline"""
+        with self._lock:
+            batch = self._pending.pop(user_id, None)
+        if batch is not None:
+            store_alerts(batch["alerts"], batch["email"])
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.clear()
+            self._wake.wait(self.flush())
+
+alert_coalescer = AlertCoalescer(ALERT_COALESCE_SECONDS)
+
+@app.on_event("startup")
+def start_alert_coalescer():
+    if ALERT_COALESCE_SECONDS > 0:
+        alert_coalescer.start()
+
+@app.on_event("shutdown")
+def stop_alert_coalescer():
+    alert_coalescer.stop()
+
+def trigger_proactive_alert(alert_data: dict, coalesce: bool = True):
     """Function to trigger proactive alerts"""
     try:
-        print(f"🚨 Triggering proactive alert: {alert_data['title']}")
-        
-        # Store alert in database
-        alerts_collection = db.proactive_alerts
-        alert_document = {
-            "user_id": alert_data.get("user_id"),
-            "alert_type": alert_data.get("alert_type"),
-            "title": alert_data.get("title"),
-            "description": alert_data.get("description"),
-            "priority": alert_data.get("priority", "medium"),
-            "triggered_at": datetime.utcnow(),
-            "status": "active",
-            "read": False
-        }
-        
-        result = alerts_collection.insert_one(alert_document)
-        print(f"✅ Alert stored with ID: {result.inserted_id}")
-        
-        # Send email notification if configured
-        if alert_data.get("send_email", True):
-            user_email = alert_data.get("user_email")
-            if user_email:
-                send_email(
-                    user_email,
-                    f"Proactive Alert: {alert_data['title']}",
-                    f"Alert Details:\n\n{alert_data['description']}\n\nPriority: {alert_data['priority'].upper()}\n\nTriggered at: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} UTC"
-                )
-                print(f"📧 Email notification sent to {user_email}")
-        
+        logger.info("Triggering proactive alert", extra={"title": alert_data["title"]})
+        alert_document = build_alert_document(alert_data)
+        user_email = alert_data.get("user_email") if alert_data.get("send_email", True) else None
+        bypass = ALERT_CRITICAL_BYPASS and alert_document["priority"] == "critical"
+        if coalesce and ALERT_COALESCE_SECONDS > 0 and not bypass and alert_document["user_id"]:
+            alert_coalescer.add(alert_document, user_email)
+        else:
+            store_alerts([alert_document], user_email)
         return True
-    except Exception as e:
-        print(f"❌ Error triggering proactive alert: {str(e)}")
+    except Exception:
+        logger.exception("Error triggering proactive alert")
         return False
 
 def generate_automated_report(report_config: dict):
     """Function to generate automated reports"""
     try:
-        print(f"📊 Generating automated report: {report_config['title']}")
+        logger.info("Generating automated report", extra={"title": report_config["title"]})
         
         user_id = report_config.get("user_id")
         report_type = report_config.get("report_type")
         
-        # Get user's regulatory data
-        regulatory_collection = db.regulatory_data
-        user_data = list(regulatory_collection.find({"user_id": user_id}))
+        # Get user's regulatory statistics
+        stats = get_regulatory_stats(user_id)
         
-        if not user_data:
-            print(f"⚠️ No data found for user {user_id}")
+        if not stats:
+            logger.warning("No data found for report", extra={"user_id": user_id})
             return False
         
         # Generate report based on type
@@ -527,14 +2131,12 @@ def generate_automated_report(report_config: dict):
         
         if report_type == "compliance":
             # Analyze compliance status
-            all_records = []
-            for upload in user_data:
-                all_records.extend(upload.get("data", []))
-            
             report_content = {
                 "report_type": "Compliance Summary",
                 "generated_at": datetime.utcnow().isoformat(),
-                "total_records": len(all_records),
+                "total_records": stats.get("record_count", 0),
+                "industry_totals": stats.get("industries", {}),
+                "last_upload_at": stats["last_upload_at"].isoformat() if stats.get("last_upload_at") else None,
                 "compliance_status": "Under Review",
                 "recommendations": [
                     "Review upcoming compliance deadlines",
@@ -566,7 +2168,7 @@ def generate_automated_report(report_config: dict):
         }
         
         result = reports_collection.insert_one(report_document)
-        print(f"✅ Report stored with ID: {result.inserted_id}")
+        logger.debug("Report stored", extra={"report_id": result.inserted_id})
         
         # Send report via email if configured
         recipients = report_config.get("recipients", [])
@@ -578,13 +2180,97 @@ def generate_automated_report(report_config: dict):
                     f"Automated Report: {report_config['title']}",
                     f"Report Generated: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} UTC\n\n{report_text}"
                 )
-                print(f"📧 Report sent to {recipient}")
+                logger.debug("Report email queued", extra={"to": recipient})
         
         return True
-    except Exception as e:
-        print(f"❌ Error generating automated report: {str(e)}")
+    except Exception:
+        logger.exception("Error generating automated report")
         return False
 
+# Scheduled job registration, shared by the endpoints and the startup rebuild
+def add_alert_job(job_id: str, alert_data: dict, trigger_time: datetime, recurrence: Optional[str]):
+    """Register (or replace) the scheduler job for an alert schedule"""
+    if recurrence:
+        # Schedule recurring alert
+        if recurrence == "daily":
+            trigger = CronTrigger(hour=trigger_time.hour, minute=trigger_time.minute)
+        elif recurrence == "weekly":
+            trigger = CronTrigger(day_of_week=trigger_time.weekday(), hour=trigger_time.hour, minute=trigger_time.minute)
+        elif recurrence == "monthly":
+            trigger = CronTrigger(day=trigger_time.day, hour=trigger_time.hour, minute=trigger_time.minute)
+        else:
+            return
+    else:
+        # Schedule one-time alert
+        trigger = DateTrigger(run_date=trigger_time)
+    scheduler.add_job(
+        trigger_proactive_alert,
+        trigger,
+        args=[alert_data],
+        id=job_id,
+        replace_existing=True
+    )
+
+def add_report_job(job_id: str, report_config: dict, schedule_cron: str):
+    """Register (or replace) the scheduler job for a report schedule"""
+    cron_parts = schedule_cron.split()
+    if len(cron_parts) != 5:
+        raise ValueError("Invalid cron expression. Expected format: 'minute hour day month day_of_week'")
+    minute, hour, day, month, day_of_week = cron_parts
+    scheduler.add_job(
+        generate_automated_report,
+        CronTrigger(
+            minute=minute,
+            hour=hour,
+            day=day,
+            month=month,
+            day_of_week=day_of_week
+        ),
+        args=[report_config],
+        id=job_id,
+        replace_existing=True
+    )
+
+def rebuild_scheduled_jobs():
+    """Re-register any stored alert or report schedule whose job is missing from the job store"""
+    existing = {job.id for job in scheduler.get_jobs()}
+    emails = {}
+    now = datetime.utcnow()
+    restored = 0
+    with job_store.batch():
+        for schedule in db.alert_schedules.find({"enabled": True, "job_id": {"$nin": list(existing)}}):
+            trigger_time = schedule["trigger_date"] - timedelta(days=schedule.get("advance_days", 7))
+            if not schedule.get("recurrence") and trigger_time <= now:
+                continue
+            user_id = schedule["user_id"]
+            if user_id not in emails:
+                user = users_collection.find_one({"_id": ObjectId(user_id)}, {"email": 1})
+                emails[user_id] = user["email"] if user else None
+            alert_data = {
+                "user_id": user_id,
+                "user_email": emails[user_id],
+                "alert_type": schedule["alert_type"],
+                "title": schedule["title"],
+                "description": schedule["description"],
+                "priority": schedule.get("priority", "medium")
+            }
+            add_alert_job(schedule["job_id"], alert_data, trigger_time, schedule.get("recurrence"))
+            restored += 1
+        for schedule in db.report_schedules.find({"enabled": True, "job_id": {"$nin": list(existing)}}):
+            report_config = {
+                "user_id": schedule["user_id"],
+                "report_type": schedule["report_type"],
+                "title": schedule["title"],
+                "recipients": schedule.get("recipients", []),
+                "include_charts": schedule.get("include_charts", True)
+            }
+            try:
+                add_report_job(schedule["job_id"], report_config, schedule["schedule_cron"])
+                restored += 1
+            except ValueError as e:
+                logger.warning("Skipping report schedule", extra={"job_id": schedule["job_id"], "error": str(e)})
+    logger.info("Restored scheduled jobs from stored schedules", extra={"restored": restored})
+
 # API Endpoints for Proactive Alerts and Reports
 @app.post("/proactive-alerts/schedule")
 async def schedule_proactive_alert(
@@ -606,7 +2292,9 @@ async def schedule_proactive_alert(
                 "description": alert_schedule.description,
                 "priority": alert_schedule.priority
             }
-            trigger_proactive_alert(alert_data)
+            await run_db(trigger_proactive_alert, alert_data)
+            # Send it (with anything else pending for this user) before saying it was triggered
+            await run_db(alert_coalescer.flush_user, current_user["id"])
             
             return {
                 "success": True,
@@ -626,41 +2314,7 @@ async def schedule_proactive_alert(
             "priority": alert_schedule.priority
         }
         
-        if alert_schedule.recurrence:
-            # Schedule recurring alert
-            if alert_schedule.recurrence == "daily":
-                scheduler.add_job(
-                    trigger_proactive_alert,
-                    CronTrigger(hour=trigger_time.hour, minute=trigger_time.minute),
-                    args=[alert_data],
-                    id=job_id,
-                    replace_existing=True
-                )
-            elif alert_schedule.recurrence == "weekly":
-                scheduler.add_job(
-                    trigger_proactive_alert,
-                    CronTrigger(day_of_week=trigger_time.weekday(), hour=trigger_time.hour, minute=trigger_time.minute),
-                    args=[alert_data],
-                    id=job_id,
-                    replace_existing=True
-                )
-            elif alert_schedule.recurrence == "monthly":
-                scheduler.add_job(
-                    trigger_proactive_alert,
-                    CronTrigger(day=trigger_time.day, hour=trigger_time.hour, minute=trigger_time.minute),
-                    args=[alert_data],
-                    id=job_id,
-                    replace_existing=True
-                )
-        else:
-            # Schedule one-time alert
-            scheduler.add_job(
-                trigger_proactive_alert,
-                DateTrigger(run_date=trigger_time),
-                args=[alert_data],
-                id=job_id,
-                replace_existing=True
-            )
+        await run_db(add_alert_job, job_id, alert_data, trigger_time, alert_schedule.recurrence)
         
         # Store schedule in database
         schedules_collection = db.alert_schedules
@@ -678,7 +2332,7 @@ async def schedule_proactive_alert(
             "created_at": datetime.utcnow()
         }
         
-        result = schedules_collection.insert_one(schedule_document)
+        result = await run_db(schedules_collection.insert_one, schedule_document)
         
         return {
             "success": True,
@@ -689,12 +2343,210 @@ async def schedule_proactive_alert(
         }
         
     except Exception as e:
-        print(f"❌ Error scheduling proactive alert: {str(e)}")
+        logger.exception("Error scheduling proactive alert")
         raise HTTPException(
             status_code=500,
             detail=f"Error scheduling proactive alert: {str(e)}"
         )
 
+# Bulk alert scheduling: a JSON list, CSV or iCal calendar of AlertSchedule entries
+MAX_BULK_ALERT_SCHEDULES = int(os.getenv("MAX_BULK_ALERT_SCHEDULES", 10000))
+SUPPORTED_RECURRENCES = {None, "daily", "weekly", "monthly"}
+ICAL_RECURRENCES = {"DAILY": "daily", "WEEKLY": "weekly", "MONTHLY": "monthly", "YEARLY": "yearly"}
+
+def parse_alert_schedules_csv(text: str) -> List[dict]:
+    """One AlertSchedule per row, headed by its field names; empty cells take the defaults"""
+    return [
+        {field: value for field, value in row.items() if field and value not in (None, "")}
+        for row in csv.DictReader(io.StringIO(text))
+    ]
+
+def _ical_text(value: str) -> str:
+    return re.sub(r"\\([\\;,nN])", lambda match: "\n" if match.group(1) in "nN" else match.group(1), value)
+
+def _ical_datetime(value: str) -> datetime:
+    # Dates are taken as midnight; UTC ("Z"), floating and TZID times are all read as UTC,
+    # the convention the rest of the API uses
+    if len(value) == 8:
+        return datetime.strptime(value, "%Y%m%d")
+    return datetime.strptime(value.rstrip("Z"), "%Y%m%dT%H%M%S")
+
+def _ical_priority(value: str) -> str:
+    # RFC 5545: 1-4 high, 5 medium, 6-9 low, 0 undefined
+    level = int(value) if value.isdigit() else 0
+    return "high" if 1 <= level <= 4 else "low" if level >= 6 else "medium"
+
+def parse_alert_schedules_ical(text: str) -> List[dict]:
+    """One AlertSchedule per VEVENT: SUMMARY, DESCRIPTION, DTSTART, RRULE FREQ, PRIORITY, CATEGORIES"""
+    # Unfold continuation lines (RFC 5545 3.1)
+    lines = text.replace("\r\n", "\n").replace("\n ", "").replace("\n\t", "").split("\n")
+    schedules, event = [], None
+    for line in lines:
+        if line == "BEGIN:VEVENT":
+            event = {"alert_type": "compliance_deadline", "description": ""}
+        elif line == "END:VEVENT" and event is not None:
+            schedules.append(event)
+            event = None
+        elif event is not None and ":" in line:
+            name_and_params, value = line.split(":", 1)
+            name = name_and_params.split(";", 1)[0]
+            try:
+                if name == "SUMMARY":
+                    event["title"] = _ical_text(value)
+                elif name == "DESCRIPTION":
+                    event["description"] = _ical_text(value)
+                elif name == "DTSTART":
+                    event["trigger_date"] = _ical_datetime(value)
+                elif name == "RRULE":
+                    rule = dict(part.split("=", 1) for part in value.split(";") if "=" in part)
+                    event["recurrence"] = ICAL_RECURRENCES.get(rule.get("FREQ"), rule.get("FREQ", "").lower())
+                elif name == "PRIORITY":
+                    event["priority"] = _ical_priority(value)
+                elif name == "CATEGORIES":
+                    event["alert_type"] = value.split(",")[0].strip().lower().replace(" ", "_") or event["alert_type"]
+            except ValueError:
+                event[f"invalid_{name.lower()}"] = value
+    return schedules
+
+async def read_bulk_alert_schedules(request: Request) -> List[dict]:
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=400, detail="Expected a CSV or iCal file in the 'file' field")
+        text = (await upload.read()).decode("utf-8-sig")
+        if (upload.filename or "").lower().endswith(".ics") or text.lstrip().startswith("BEGIN:VCALENDAR"):
+            return parse_alert_schedules_ical(text)
+        return parse_alert_schedules_csv(text)
+    try:
+        body = orjson.loads(await request.body())
+    except orjson.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Body must be a JSON list of alert schedules")
+    if isinstance(body, dict):
+        body = body.get("schedules")
+    if not isinstance(body, list):
+        raise HTTPException(status_code=400, detail="Body must be a JSON list of alert schedules")
+    return body
+
+def validate_alert_schedule(item) -> AlertSchedule:
+    if not isinstance(item, dict):
+        raise ValueError("Each schedule must be an object")
+    unparsed = [key[len("invalid_"):].upper() for key in item if key.startswith("invalid_")]
+    if unparsed:
+        raise ValueError(f"Could not parse {', '.join(unparsed)}")
+    schedule = AlertSchedule(**item)
+    if schedule.trigger_date.tzinfo is not None:
+        schedule.trigger_date = schedule.trigger_date.astimezone(timezone.utc).replace(tzinfo=None)
+    if schedule.recurrence not in SUPPORTED_RECURRENCES:
+        raise ValueError(f"Unsupported recurrence: {schedule.recurrence}")
+    return schedule
+
+def schedule_alerts_bulk(user: dict, schedules: List[tuple]) -> List[dict]:
+    """Persist (index, AlertSchedule) pairs with one ordered insert_many and register their jobs in one batch"""
+    now = datetime.utcnow()
+    results, documents, alert_data, due = [], [], [], []
+    for index, schedule in schedules:
+        alert = {
+            "user_id": user["id"],
+            "user_email": user.get("email"),
+            "alert_type": schedule.alert_type,
+            "title": schedule.title,
+            "description": schedule.description,
+            "priority": schedule.priority
+        }
+        trigger_time = schedule.trigger_date - timedelta(days=schedule.advance_days)
+        if trigger_time <= now and not schedule.recurrence:
+            due.append((index, alert))
+            continue
+        schedule_id = ObjectId()
+        documents.append({
+            "_id": schedule_id,
+            "user_id": user["id"],
+            # The schedule id keeps job ids unique when deadlines share a timestamp
+            "job_id": f"alert_{user['id']}_{schedule_id}",
+            "alert_type": schedule.alert_type,
+            "title": schedule.title,
+            "description": schedule.description,
+            "trigger_date": schedule.trigger_date,
+            "advance_days": schedule.advance_days,
+            "recurrence": schedule.recurrence,
+            "priority": schedule.priority,
+            "enabled": schedule.enabled,
+            "created_at": now
+        })
+        alert_data.append((index, alert, trigger_time))
+
+    stored = len(documents)
+    if documents:
+        try:
+            db.alert_schedules.insert_many(documents, ordered=True)
+        except BulkWriteError as e:
+            # Ordered: everything before the first failure was written, nothing after it
+            stored = e.details["nInserted"]
+            failure = e.details["writeErrors"][0]["errmsg"] if e.details["writeErrors"] else "write failed"
+            for (index, _, _) in alert_data[stored:]:
+                results.append({"index": index, "status": "error", "error": failure})
+
+    with job_store.batch():
+        for document, (index, alert, trigger_time) in zip(documents[:stored], alert_data[:stored]):
+            if document["enabled"]:
+                add_alert_job(document["job_id"], alert, trigger_time, document["recurrence"])
+            results.append({
+                "index": index,
+                "status": "scheduled" if document["enabled"] else "stored",
+                "schedule_id": str(document["_id"]),
+                "job_id": document["job_id"],
+                "trigger_time": trigger_time
+            })
+
+    triggered_results = []
+    for index, alert in due:
+        # Past due, as with the single-item endpoint: trigger right away
+        triggered = trigger_proactive_alert(alert)
+        result = {"index": index, "status": "triggered"} if triggered else {"index": index, "status": "error", "error": "Alert could not be triggered"}
+        results.append(result)
+        if triggered:
+            triggered_results.append(result)
+    if due:
+        # Write them (in one digest) before reporting them as triggered
+        try:
+            alert_coalescer.flush_user(user["id"])
+        except Exception:
+            logger.exception("Error flushing bulk-triggered alerts", extra={"alerts": len(triggered_results)})
+            for result in triggered_results:
+                result.update({"status": "error", "error": "Alert could not be triggered"})
+    return results
+
+@app.post("/proactive-alerts/schedule/bulk")
+async def schedule_proactive_alerts_bulk(request: Request, current_user: dict = Depends(get_current_user)):
+    """Schedule many proactive alerts from a JSON list, CSV file or iCal calendar"""
+    items = await read_bulk_alert_schedules(request)
+    if len(items) > MAX_BULK_ALERT_SCHEDULES:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_ALERT_SCHEDULES} schedules per request")
+    results, valid = [], []
+    for index, item in enumerate(items):
+        try:
+            valid.append((index, validate_alert_schedule(item)))
+        except (ValueError, TypeError) as e:
+            detail = "; ".join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors()) if hasattr(e, "errors") else str(e)
+            results.append({"index": index, "status": "error", "error": detail})
+    try:
+        results.extend(await run_db(schedule_alerts_bulk, current_user, valid))
+    except Exception as e:
+        logger.exception("Error scheduling proactive alerts in bulk")
+        raise HTTPException(status_code=500, detail=f"Error scheduling proactive alerts: {str(e)}")
+    results.sort(key=lambda result: result["index"])
+    counts = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    return FastJSONResponse({
+        "success": not counts.get("error"),
+        "total": len(items),
+        "counts": counts,
+        "results": results
+    })
+
 @app.post("/automated-reports/schedule")
 async def schedule_automated_report(
     report_schedule: ReportSchedule,
@@ -713,25 +2565,7 @@ async def schedule_automated_report(
         }
         
         # Parse cron expression and schedule job
-        cron_parts = report_schedule.schedule_cron.split()
-        if len(cron_parts) == 5:
-            minute, hour, day, month, day_of_week = cron_parts
-            
-            scheduler.add_job(
-                generate_automated_report,
-                CronTrigger(
-                    minute=minute,
-                    hour=hour,
-                    day=day,
-                    month=month,
-                    day_of_week=day_of_week
-                ),
-                args=[report_config],
-                id=job_id,
-                replace_existing=True
-            )
-        else:
-            raise ValueError("Invalid cron expression. Expected format: 'minute hour day month day_of_week'")
+        await run_db(add_report_job, job_id, report_config, report_schedule.schedule_cron)
         
         # Store schedule in database
         report_schedules_collection = db.report_schedules
@@ -747,7 +2581,7 @@ async def schedule_automated_report(
             "created_at": datetime.utcnow()
         }
         
-        result = report_schedules_collection.insert_one(schedule_document)
+        result = await run_db(report_schedules_collection.insert_one, schedule_document)
         
         return {
             "success": True,
@@ -758,7 +2592,7 @@ async def schedule_automated_report(
         }
         
     except Exception as e:
-        print(f"❌ Error scheduling automated report: {str(e)}")
+        logger.exception("Error scheduling automated report")
         raise HTTPException(
             status_code=500,
             detail=f"Error scheduling automated report: {str(e)}"
@@ -769,10 +2603,10 @@ async def get_proactive_alerts(current_user: dict = Depends(get_current_user)):
     """Get all proactive alerts for the current user"""
     try:
         alerts_collection = db.proactive_alerts
-        alerts = list(alerts_collection.find(
+        alerts = await run_db(lambda: list(alerts_collection.find(
             {"user_id": current_user["id"]},
             {"_id": 0}
-        ).sort("triggered_at", -1).limit(50))
+        ).sort("triggered_at", -1).limit(50)))
         
         return {
             "success": True,
@@ -781,7 +2615,7 @@ async def get_proactive_alerts(current_user: dict = Depends(get_current_user)):
         }
         
     except Exception as e:
-        print(f"❌ Error retrieving proactive alerts: {str(e)}")
+        logger.exception("Error retrieving proactive alerts")
         raise HTTPException(
             status_code=500,
             detail=f"Error retrieving proactive alerts: {str(e)}"
@@ -792,10 +2626,10 @@ async def get_alert_schedules(current_user: dict = Depends(get_current_user)):
     """Get all alert schedules for the current user"""
     try:
         schedules_collection = db.alert_schedules
-        schedules = list(schedules_collection.find(
+        schedules = await run_db(lambda: list(schedules_collection.find(
             {"user_id": current_user["id"]},
             {"_id": 0}
-        ).sort("created_at", -1))
+        ).sort("created_at", -1)))
         
         return {
             "success": True,
@@ -804,7 +2638,7 @@ async def get_alert_schedules(current_user: dict = Depends(get_current_user)):
         }
         
     except Exception as e:
-        print(f"❌ Error retrieving alert schedules: {str(e)}")
+        logger.exception("Error retrieving alert schedules")
         raise HTTPException(
             status_code=500,
             detail=f"Error retrieving alert schedules: {str(e)}"
@@ -815,10 +2649,10 @@ async def get_automated_reports(current_user: dict = Depends(get_current_user)):
     """Get all automated reports for the current user"""
     try:
         reports_collection = db.automated_reports
-        reports = list(reports_collection.find(
+        reports = await run_db(lambda: list(reports_collection.find(
             {"user_id": current_user["id"]},
             {"_id": 0}
-        ).sort("generated_at", -1).limit(20))
+        ).sort("generated_at", -1).limit(20)))
         
         return {
             "success": True,
@@ -827,7 +2661,7 @@ async def get_automated_reports(current_user: dict = Depends(get_current_user)):
         }
         
     except Exception as e:
-        print(f"❌ Error retrieving automated reports: {str(e)}")
+        logger.exception("Error retrieving automated reports")
         raise HTTPException(
             status_code=500,
             detail=f"Error retrieving automated reports: {str(e)}"
@@ -852,7 +2686,8 @@ async def trigger_alert_now(
             "priority": priority
         }
         
-        success = trigger_proactive_alert(alert_data)
+        # A manual trigger is stored and emailed right away rather than coalesced
+        success = await run_db(trigger_proactive_alert, alert_data, coalesce=False)
         
         if success:
             return {
@@ -867,7 +2702,7 @@ async def trigger_alert_now(
             )
             
     except Exception as e:
-        print(f"❌ Error triggering alert: {str(e)}")
+        logger.exception("Error triggering alert")
         raise HTTPException(
             status_code=500,
             detail=f"Error triggering alert: {str(e)}"
@@ -890,7 +2725,7 @@ async def generate_report_now(
             "include_charts": True
         }
         
-        success = generate_automated_report(report_config)
+        success = await run_db(generate_automated_report, report_config)
         
         if success:
             return {
@@ -905,145 +2740,791 @@ async def generate_report_now(
             )
             
     except Exception as e:
-        print(f"❌ Error generating report: {str(e)}")
+        logger.exception("Error generating report")
         raise HTTPException(
             status_code=500,
             detail=f"Error generating report: {str(e)}"
         )
 
 @app.get("/carbon-analysis")
-def carbon_analysis():
-{{ ... }}
-        "analysis": {
-            "total_emissions": 12345,
-            "trend": "decreasing",
-            "recommendation": "Continue current strategy",
-            "monthly_data": [
-                {"month": "Jan", "emissions": 12000},
-                {"month": "Feb", "emissions": 11800},
-                {"month": "Mar", "emissions": 11500}
-            ]
+async def carbon_analysis(request: Request, current_user: dict = Depends(get_current_user)):
+    def render(overview):
+        trend = emissions_trend(overview["monthly"])
+        return {
+            "analysis": {
+                "total_emissions": overview["total_emissions"],
+                "trend": trend,
+                "recommendation": TREND_RECOMMENDATIONS[trend],
+                "monthly_data": overview["monthly"],
+                "by_industry": [
+                    {"industry": industry["industry"], "emissions": industry["emissions"]}
+                    for industry in overview["industries"]
+                ]
+            }
+        }
+    return await serve_user_view(request, current_user["id"], "carbon-analysis", render)
+
+# Per-user regulatory statistics, maintained incrementally on every upload so
+# reports read one small document instead of scanning every stored row
+regulatory_stats_collection = db.regulatory_stats
+
+def _industry_key(industry) -> str:
+    # Mongo field names may not contain dots or start with $
+    return str(industry).replace(".", "_").lstrip("$") or "Unknown"
+
+def summarize_regulatory_frame(df) -> dict:
+    """Record count plus per-industry record counts, emissions and compliance cost totals"""
+    summary = {"record_count": len(df), "industries": {}}
+    if "Industry" not in df.columns or df.empty:
+        return summary
+    totals = pd.DataFrame({
+        "Industry": df["Industry"].fillna("Unknown"),
+        "emissions": pd.to_numeric(df["Emissions"], errors="coerce") if "Emissions" in df.columns else 0.0,
+        "compliance_cost": pd.to_numeric(df["ComplianceCost"], errors="coerce") if "ComplianceCost" in df.columns else 0.0,
+    }).groupby("Industry").agg(
+        record_count=("emissions", "size"),
+        emissions=("emissions", "sum"),
+        compliance_cost=("compliance_cost", "sum")
+    )
+    for industry, row in totals.iterrows():
+        summary["industries"][_industry_key(industry)] = {
+            "record_count": int(row["record_count"]),
+            "emissions": float(row["emissions"]),
+            "compliance_cost": float(row["compliance_cost"])
         }
+    return summary
+
+def merge_regulatory_summaries(total: dict, summary: dict) -> dict:
+    total["record_count"] += summary["record_count"]
+    for industry, values in summary["industries"].items():
+        current = total["industries"].setdefault(industry, {"record_count": 0, "emissions": 0.0, "compliance_cost": 0.0})
+        for field, value in values.items():
+            current[field] += value
+    return total
+
+def _month_key(upload_date: datetime) -> str:
+    return upload_date.strftime("%Y-%m")
+
+def _stats_increments(summary: dict, upload_date: datetime, count_upload: bool = True) -> dict:
+    month = _month_key(upload_date)
+    increments = {
+        "record_count": summary["record_count"],
+        "upload_count": 1 if count_upload else 0,
+        f"monthly.{month}.record_count": summary["record_count"],
+        f"monthly.{month}.emissions": sum(values["emissions"] for values in summary["industries"].values()),
+    }
+    for industry, values in summary["industries"].items():
+        for field, value in values.items():
+            increments[f"industries.{industry}.{field}"] = value
+    return increments
+
+def backfill_regulatory_stats(user_id: str):
+    """Fold uploads stored before stats were kept into the user's stats document, exactly once"""
+    if regulatory_stats_collection.find_one({"user_id": user_id, "backfilled": True}, {"_id": 1}):
+        return
+    # Uploads written since stats were introduced carry stats_recorded and are already counted
+    increments = {}
+    last_upload_at = None
+    for upload in db.regulatory_data.find(
+        {"user_id": user_id, "stats_recorded": {"$ne": True}},
+        {"data": 1, "storage": 1, "content_id": 1, "upload_date": 1}
+    ):
+        summary = summarize_regulatory_frame(pd.DataFrame(load_upload_records(upload)))
+        for field, value in _stats_increments(summary, upload["upload_date"]).items():
+            increments[field] = increments.get(field, 0) + value
+        last_upload_at = max(filter(None, [last_upload_at, upload.get("upload_date")]), default=None)
+    update = {"$set": {"backfilled": True}}
+    if increments:
+        update["$inc"] = increments
+    if last_upload_at:
+        update["$max"] = {"last_upload_at": last_upload_at}
+    try:
+        regulatory_stats_collection.update_one({"user_id": user_id, "backfilled": {"$ne": True}}, update, upsert=True)
+    except DuplicateKeyError:
+        # A concurrent request set the flag first; its backfill already counted these uploads
+        pass
+
+def record_regulatory_stats(user_id: str, summary: dict, upload_date: datetime, direction: int = 1, count_upload: bool = True):
+    """Fold one upload's summary into the user's stats document (direction=-1 takes it back out)"""
+    backfill_regulatory_stats(user_id)
+    increments = _stats_increments(summary, upload_date, count_upload)
+    update = {"$inc": {field: value * direction for field, value in increments.items()}}
+    if direction > 0:
+        update["$max"] = {"last_upload_at": upload_date}
+    regulatory_stats_collection.update_one({"user_id": user_id}, update, upsert=True)
+
+def get_regulatory_stats(user_id: str):
+    """Return the user's stats document, or None if they have no data"""
+    backfill_regulatory_stats(user_id)
+    stats = regulatory_stats_collection.find_one({"user_id": user_id}, {"_id": 0, "backfilled": 0})
+    return stats if stats and (stats.get("upload_count") or stats.get("record_count")) else None
+
+# Streaming ingest: rows are parsed from the spooled upload in fixed-size chunks
+# and stored one document per row in regulatory_rows, keyed by upload_id
+REGULATORY_CHUNK_ROWS = int(os.getenv("REGULATORY_CHUNK_ROWS", 10000))
+
+# Content-addressed storage: each distinct file a user uploads is stored once in
+# regulatory_contents, keyed by its SHA-256, and every upload header in regulatory_data
+# with that hash points at it through content_id. ref_count tracks the headers.
+# Dedup is per user, so one user's uploads never reveal another's.
+regulatory_contents_collection = db.regulatory_contents
+UPLOAD_HASH_CHUNK_BYTES = 1 << 20
+
+def hash_upload_file(file: UploadFile) -> str:
+    """SHA-256 of the spooled upload, read in fixed-size blocks"""
+    digest = hashlib.sha256()
+    file.file.seek(0)
+    for block in iter(lambda: file.file.read(UPLOAD_HASH_CHUNK_BYTES), b""):
+        digest.update(block)
+    file.file.seek(0)
+    return digest.hexdigest()
+
+def acquire_upload_content(user_id: str, sha256: str) -> Optional[dict]:
+    """Take a reference on the user's stored copy of a file, if there is one"""
+    return regulatory_contents_collection.find_one_and_update(
+        {"user_id": user_id, "sha256": sha256},
+        {"$inc": {"ref_count": 1}},
+        projection={"data": 0},
+        return_document=ReturnDocument.AFTER
+    )
+
+def store_upload_content(content: dict) -> dict:
+    """Insert new content holding one reference, or reference the copy a concurrent identical upload stored first"""
+    while True:
+        try:
+            regulatory_contents_collection.insert_one(content)
+            return content
+        except DuplicateKeyError:
+            existing = acquire_upload_content(content["user_id"], content["sha256"])
+            if existing is not None:
+                return existing
+
+def link_duplicate_upload(user_id: str, filename: str, content: dict) -> dict:
+    """Record an upload of a file the user already stored, without parsing or copying it"""
+    upload_date = datetime.utcnow()
+    upload_id = db.regulatory_data.insert_one({
+        "user_id": user_id,
+        "filename": filename,
+        "upload_date": upload_date,
+        "storage": content["storage"],
+        "content_id": content["_id"],
+        "sha256": content["sha256"],
+        "status": "completed",
+        "stats_recorded": True,
+        "record_count": content["record_count"],
+        "columns": content.get("columns", [])
+    }).inserted_id
+    record_regulatory_stats(user_id, content["summary"], upload_date)
+    invalidate_user_overview(user_id)
+    return {
+        "success": True,
+        "duplicate": True,
+        "message": f"Identical file already uploaded; linked to the existing {content['record_count']} records",
+        "upload_id": str(upload_id),
+        "content_id": str(content["_id"]),
+        "record_count": content["record_count"],
+        "columns": content.get("columns", [])
+    }
+
+def ingest_regulatory_rows(file: UploadFile, user_id: str, sha256: str):
+    """Stream a CSV upload into regulatory_rows in batches, tracking progress on the upload document"""
+    regulatory_collection = db.regulatory_data
+    rows_collection = db.regulatory_rows
+    upload_date = datetime.utcnow()
+    # Rows belong to the content, so regulatory_rows.upload_id holds the content id
+    content_id = ObjectId()
+    upload_id = regulatory_collection.insert_one({
+        "user_id": user_id,
+        "filename": file.filename,
+        "upload_date": upload_date,
+        "storage": "rows",
+        "content_id": content_id,
+        "sha256": sha256,
+        "status": "ingesting",
+        "stats_recorded": True,
+        "record_count": 0,
+        "chunks_processed": 0
+    }).inserted_id
+
+    record_count = 0
+    chunks_processed = 0
+    columns = []
+    summary = {"record_count": 0, "industries": {}}
+    parse_seconds = 0.0
+    try:
+        file.file.seek(0)
+        chunks = iter_upload_chunks(file.file, REGULATORY_CHUNK_ROWS)
+        while True:
+            started = time.perf_counter()
+            chunk = next(chunks, None)
+            parse_seconds += time.perf_counter() - started
+            if chunk is None:
+                break
+            columns = list(chunk.columns)
+            merge_regulatory_summaries(summary, summarize_regulatory_frame(chunk))
+            rows = chunk.to_dict("records")
+            for offset, row in enumerate(rows):
+                row["upload_id"] = content_id
+                row["row_number"] = record_count + offset
+            rows_collection.insert_many(rows, ordered=False)
+            record_count += len(rows)
+            chunks_processed += 1
+            regulatory_collection.update_one(
+                {"_id": upload_id},
+                {"$set": {"record_count": record_count, "chunks_processed": chunks_processed}}
+            )
+        content = store_upload_content({
+            "_id": content_id,
+            "user_id": user_id,
+            "sha256": sha256,
+            "storage": "rows",
+            "ref_count": 1,
+            "record_count": record_count,
+            "columns": columns,
+            "summary": summary,
+            "created_at": upload_date
+        })
+    except Exception:
+        rows_collection.delete_many({"upload_id": content_id})
+        regulatory_collection.delete_one({"_id": upload_id})
+        raise
+    if content["_id"] != content_id:
+        # An identical upload finished first; share its rows and drop ours
+        rows_collection.delete_many({"upload_id": content_id})
+
+    regulatory_collection.update_one(
+        {"_id": upload_id},
+        {"$set": {"status": "completed", "columns": columns, "content_id": content["_id"]}}
+    )
+    record_regulatory_stats(user_id, summary, upload_date)
+    invalidate_user_overview(user_id)
+    file.file.seek(0)
+    observe_upload_parse("regulatory_upload", detect_upload_format(file.file.read(6)), parse_seconds, record_count)
+    return {
+        "success": True,
+        "duplicate": False,
+        "message": f"Successfully uploaded {record_count} records",
+        "upload_id": str(upload_id),
+        "content_id": str(content["_id"]),
+        "record_count": record_count,
+        "chunks_processed": chunks_processed,
+        "chunk_size": REGULATORY_CHUNK_ROWS
     }
 
+def _upload_rows_key(upload: dict):
+    # Uploads stored before content addressing key their rows by the upload itself
+    return upload.get("content_id", upload["_id"])
+
+def _upload_document(upload: dict, projection: dict) -> dict:
+    """The document holding an upload's inline rows: its content, or the upload itself for older uploads"""
+    if upload.get("content_id"):
+        return regulatory_contents_collection.find_one({"_id": upload["content_id"]}, projection) or {}
+    return db.regulatory_data.find_one({"_id": upload["_id"]}, projection) or {}
+
+def load_upload_records(upload: dict):
+    """Return the rows of an upload regardless of how they were stored"""
+    if upload.get("storage") == "rows":
+        return list(db.regulatory_rows.find(
+            {"upload_id": _upload_rows_key(upload)},
+            {"_id": 0, "upload_id": 0, "row_number": 0}
+        ).sort("row_number", 1))
+    if upload.get("content_id"):
+        return _upload_document(upload, {"data": 1}).get("data", [])
+    return upload.get("data", [])
+
+def parse_regulatory_document(content: bytes):
+    """Parse a document-mode upload into its frame, row dicts and stats summary"""
+    started = time.perf_counter()
+    df = read_upload_frame(content)
+    observe_upload_parse("regulatory_upload", detect_upload_format(content[:6]), time.perf_counter() - started, len(df))
+    return df, df.to_dict('records'), summarize_regulatory_frame(df)
+
 @app.post("/regulatory-scanner/upload")
 async def upload_regulatory_data(
     file: UploadFile = File(...),
+    stream: bool = False,
     current_user: dict = Depends(get_current_user)
 ):
     """Upload and store regulatory scanner CSV data in the database"""
     try:
-        print(f"📤 Upload started by user: {current_user.get('email', 'Unknown')}")
-        print(f"📁 File: {file.filename}")
+        logger.info("Upload started", extra={"user_id": current_user["id"], "upload_filename": file.filename, "stream": stream})
         
-        # Read and parse CSV file
-        content = await file.read()
-        print(f"📊 File size: {len(content)} bytes")
+        # A file this user already stored is linked, not parsed or stored again
+        sha256 = await run_db(hash_upload_file, file)
+        existing = await run_db(acquire_upload_content, current_user["id"], sha256)
+        if existing is not None:
+            result = await run_db(link_duplicate_upload, current_user["id"], file.filename, existing)
+            logger.info("Duplicate upload linked", extra={"upload_id": result["upload_id"], "content_id": result["content_id"]})
+            return FastJSONResponse(result)
+        
+        if stream:
+            result = await run_db(ingest_regulatory_rows, file, current_user["id"], sha256)
+            logger.info("Upload streamed", extra={"record_count": result["record_count"], "chunks": result["chunks_processed"]})
+            return FastJSONResponse(result)
         
-        df = pd.read_csv(io.BytesIO(content))
-        print(f"📋 CSV columns: {list(df.columns)}")
-        print(f"📈 CSV rows: {len(df)}")
+        # Read the upload, then parse, convert and summarize it off the event loop
+        content = await file.read()
+        logger.debug("Upload read", extra={"bytes": len(content)})
         
-        # Convert DataFrame to list of dictionaries
-        regulatory_data = df.to_dict('records')
+        df, regulatory_data, summary = await run_in_threadpool(parse_regulatory_document, content)
+        logger.debug("Upload parsed", extra={"columns": list(df.columns), "rows": len(df)})
+        upload_date = datetime.utcnow()
         
-        # Create document to store in MongoDB
+        # Store the rows once as content, then the upload header pointing at it
+        stored = await run_db(store_upload_content, {
+            "_id": ObjectId(),
+            "user_id": current_user["id"],
+            "sha256": sha256,
+            "storage": "document",
+            "ref_count": 1,
+            "data": regulatory_data,
+            "record_count": len(regulatory_data),
+            "columns": list(df.columns),
+            "summary": summary,
+            "created_at": upload_date
+        })
         document = {
             "user_id": current_user["id"],
             "filename": file.filename,
-            "upload_date": datetime.utcnow(),
-            "data": regulatory_data,
-            "record_count": len(regulatory_data)
+            "upload_date": upload_date,
+            "storage": "document",
+            "content_id": stored["_id"],
+            "sha256": sha256,
+            "status": "completed",
+            "stats_recorded": True,
+            "record_count": len(regulatory_data),
+            "columns": list(df.columns)
         }
+        result = await run_db(db.regulatory_data.insert_one, document)
+        await run_db(record_regulatory_stats, current_user["id"], summary, upload_date)
+        invalidate_user_overview(current_user["id"])
         
-        print(f"💾 Storing document with {len(regulatory_data)} records...")
-        
-        # Store in MongoDB
-        regulatory_collection = db.regulatory_data
-        result = regulatory_collection.insert_one(document)
-        
-        print(f"✅ Successfully stored with ID: {result.inserted_id}")
-        
-        # Verify the data was stored
-        verification = regulatory_collection.find_one({"_id": result.inserted_id})
-        if verification:
-            print(f"✅ Verification successful: Document exists in database")
-        else:
-            print(f"❌ Verification failed: Document not found in database")
+        logger.info("Upload stored", extra={"upload_id": result.inserted_id, "record_count": len(regulatory_data)})
         
-        return {
+        # Summary only: echoing every stored row back doubled the response work for large uploads
+        return FastJSONResponse({
             "success": True,
+            "duplicate": False,
             "message": f"Successfully uploaded {len(regulatory_data)} records",
             "upload_id": str(result.inserted_id),
-            "data": regulatory_data
-        }
+            "content_id": str(stored["_id"]),
+            "record_count": len(regulatory_data),
+            "columns": list(df.columns)
+        })
         
     except Exception as e:
-        print(f"❌ Upload error: {str(e)}")
-        import traceback
-        print(f"📋 Traceback: {traceback.format_exc()}")
+        logger.exception("Upload error")
         raise HTTPException(
             status_code=400,
             detail=f"Error processing CSV file: {str(e)}"
         )
 
+def delete_regulatory_upload(user_id: str, upload_id: ObjectId) -> Optional[dict]:
+    """Remove an upload header, releasing its content once no other upload references it"""
+    # Count older uploads first, or subtracting this one would take the totals negative
+    backfill_regulatory_stats(user_id)
+    upload = db.regulatory_data.find_one_and_delete({"_id": upload_id, "user_id": user_id})
+    if upload is None:
+        return None
+    released = False
+    if upload.get("content_id"):
+        content = regulatory_contents_collection.find_one_and_update(
+            {"_id": upload["content_id"]},
+            {"$inc": {"ref_count": -1}},
+            projection={"data": 0},
+            return_document=ReturnDocument.AFTER
+        )
+        summary = content["summary"] if content else None
+        # Only delete while still unreferenced: an identical upload may have just re-acquired it
+        if content and content["ref_count"] <= 0 and regulatory_contents_collection.delete_one(
+            {"_id": content["_id"], "ref_count": {"$lte": 0}}
+        ).deleted_count:
+            released = True
+            if content["storage"] == "rows":
+                db.regulatory_rows.delete_many({"upload_id": content["_id"]})
+    else:
+        summary = summarize_regulatory_frame(pd.DataFrame(load_upload_records(upload)))
+        released = True
+        if upload.get("storage") == "rows":
+            db.regulatory_rows.delete_many({"upload_id": upload["_id"]})
+    if summary and upload.get("status", "completed") == "completed":
+        record_regulatory_stats(user_id, summary, upload["upload_date"], direction=-1)
+    invalidate_user_overview(user_id)
+    return {"success": True, "upload_id": str(upload_id), "content_released": released}
+
+@app.delete("/regulatory-scanner/uploads/{upload_id}")
+async def delete_regulatory_data(upload_id: str, current_user: dict = Depends(get_current_user)):
+    """Delete one of the current user's uploads"""
+    try:
+        upload_object_id = ObjectId(upload_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid upload id")
+    result = await run_db(delete_regulatory_upload, current_user["id"], upload_object_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return result
+
+# Keyset pagination over rows, newest upload first, by (upload_date, upload _id, row_number).
+# A page holds at most `limit` rows however large the uploads behind it are.
+REGULATORY_PAGE_ROWS = int(os.getenv("REGULATORY_PAGE_ROWS", 1000))
+MAX_REGULATORY_PAGE_ROWS = 10000
+
+def encode_row_cursor(upload: dict, row_number: int) -> str:
+    return f"{upload['upload_date'].isoformat()}_{upload['_id']}_{row_number}"
+
+def decode_row_cursor(cursor: str):
+    try:
+        upload_date, upload_id, row_number = cursor.rsplit("_", 2)
+        return datetime.fromisoformat(upload_date), ObjectId(upload_id), int(row_number)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def iter_upload_rows(upload: dict, fields: Optional[List[str]], start: int, limit: int):
+    """Yield (row_number, row) for up to limit rows of an upload from row_number start, projected to fields"""
+    if upload.get("storage") == "rows":
+        projection = {field: 1 for field in fields} if fields else {"upload_id": 0}
+        projection["_id"] = 0
+        if fields:
+            projection["row_number"] = 1
+        for row in db.regulatory_rows.find(
+            {"upload_id": _upload_rows_key(upload), "row_number": {"$gte": start}},
+            projection
+        ).sort("row_number", 1).limit(limit):
+            yield row.pop("row_number"), row
+    else:
+        data = _upload_document(upload, {"data": {"$slice": [start, limit]}}).get("data", [])
+        for offset, row in enumerate(data):
+            yield start + offset, ({field: row[field] for field in fields if field in row} if fields else row)
+
+def find_row_page(user_id: str, cursor: Optional[str], limit: int, fields: Optional[List[str]]):
+    """Fetch one page of rows across the user's uploads, the uploads they came from and the next cursor"""
+    query = {"user_id": user_id}
+    cursor_upload_id, start = None, 0
+    if cursor:
+        upload_date, cursor_upload_id, start = decode_row_cursor(cursor)
+        query["$or"] = [
+            {"upload_date": {"$lt": upload_date}},
+            {"upload_date": upload_date, "_id": {"$lte": cursor_upload_id}}
+        ]
+    uploads = db.regulatory_data.find(
+        query,
+        {"filename": 1, "upload_date": 1, "record_count": 1, "storage": 1, "content_id": 1}
+    ).sort([("upload_date", -1), ("_id", -1)]).batch_size(20)
+    rows, page_uploads, next_cursor = [], [], None
+    for upload in uploads:
+        wanted = limit - len(rows)
+        # One row more than the page needs says where the next page starts
+        upload_rows = list(iter_upload_rows(upload, fields, start if upload["_id"] == cursor_upload_id else 0, wanted + 1))
+        if wanted and upload_rows:
+            page_uploads.append(upload)
+            rows.extend(row for _, row in upload_rows[:wanted])
+        if len(upload_rows) > wanted:
+            next_cursor = encode_row_cursor(upload, upload_rows[wanted][0])
+            break
+    return rows, page_uploads, next_cursor
+
+def upload_summary(upload: dict) -> dict:
+    return {
+        "upload_id": str(upload["_id"]),
+        "filename": upload.get("filename"),
+        "upload_date": upload.get("upload_date"),
+        "record_count": upload.get("record_count", 0)
+    }
+
 @app.get("/regulatory-scanner/data")
-async def get_regulatory_data(current_user: dict = Depends(get_current_user)):
-    """Get all regulatory data uploaded by the current user"""
+async def get_regulatory_data(
+    cursor: Optional[str] = None,
+    limit: int = REGULATORY_PAGE_ROWS,
+    fields: Optional[str] = None,
+    format: str = "json",
+    current_user: dict = Depends(get_current_user)
+):
+    """Get one page of regulatory data rows uploaded by the current user"""
     try:
-        print(f"🔍 Data retrieval requested by user: {current_user.get('email', 'Unknown')}")
-        print(f"🆔 User ID: {current_user['id']}")
+        logger.debug("Data retrieval requested", extra={"user_id": current_user["id"]})
         
-        regulatory_collection = db.regulatory_data
+        limit = max(1, min(limit, MAX_REGULATORY_PAGE_ROWS))
+        field_list = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+        rows, uploads, next_cursor = await run_db(find_row_page, current_user["id"], cursor, limit, field_list)
         
-        # Check total documents in collection
-        total_docs = regulatory_collection.count_documents({})
-        print(f"📊 Total documents in regulatory_data collection: {total_docs}")
+        logger.debug("Page rows loaded", extra={"records": len(rows), "uploads": len(uploads)})
         
-        # Check documents for this user
-        user_doc_count = regulatory_collection.count_documents({"user_id": current_user["id"]})
-        print(f"👤 Documents for this user: {user_doc_count}")
+        if format == "ndjson":
+            response = StreamingResponse((dumps_json(row) + b"\n" for row in rows), media_type="application/x-ndjson")
+            if next_cursor:
+                response.headers["X-Next-Cursor"] = next_cursor
+            return response
         
-        user_data = list(regulatory_collection.find(
-            {"user_id": current_user["id"]},
-            {"_id": 0, "data": 1, "filename": 1, "upload_date": 1, "record_count": 1}
-        ).sort("upload_date", -1))
-        
-        print(f"📁 Found {len(user_data)} uploads for user")
-        
-        # Flatten all data from all uploads
-        all_data = []
-        for upload in user_data:
-            upload_records = upload.get("data", [])
-            all_data.extend(upload_records)
-            print(f"📄 Upload '{upload.get('filename', 'Unknown')}': {len(upload_records)} records")
-        
-        print(f"📊 Total flattened records: {len(all_data)}")
-        
-        return {
+        return FastJSONResponse({
             "success": True,
-            "data": all_data,
-            "uploads": user_data
-        }
+            "data": rows,
+            "uploads": [upload_summary(upload) for upload in uploads],
+            "next_cursor": next_cursor
+        })
         
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"❌ Data retrieval error: {str(e)}")
-        import traceback
-        print(f"📋 Traceback: {traceback.format_exc()}")
+        logger.exception("Data retrieval error")
         raise HTTPException(
             status_code=500,
             detail=f"Error retrieving regulatory data: {str(e)}"
         )
 
+# Keyed datasets: instead of piling up whole uploads, a dataset declares key columns and
+# each sync applies the upload as a diff against the rows currently stored for it.
+# Rows live in dataset_rows as {dataset_id, key, row_hash, synced_at, row}, where key
+# joins the key column values and row_hash fingerprints the row so unchanged rows are skipped
+regulatory_datasets_collection = db.regulatory_datasets
+dataset_rows_collection = db.dataset_rows
+DATASET_KEY_SEPARATOR = "\x1f"
+DATASET_WRITE_BATCH = int(os.getenv("DATASET_WRITE_BATCH", 1000))
+DATASET_SYNC_LEASE_SECONDS = int(os.getenv("DATASET_SYNC_LEASE_SECONDS", 600))
+DATASET_PAGE_SIZE = int(os.getenv("DATASET_PAGE_SIZE", 1000))
+MAX_DATASET_PAGE_SIZE = 10000
+
+def dataset_row_hash(row: dict) -> str:
+    return hashlib.sha1(orjson.dumps(row, default=_orjson_default, option=ORJSON_OPTIONS | orjson.OPT_SORT_KEYS)).hexdigest()
+
+def dataset_row_keys(df, key_fields: List[str]) -> List[str]:
+    """One key string per row, rejecting uploads whose keys are missing, blank or repeated"""
+    missing = [field for field in key_fields if field not in df.columns]
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Upload is missing key columns: {', '.join(missing)}")
+    key_frame = df[key_fields]
+    if key_frame.isna().any(axis=None):
+        raise HTTPException(status_code=400, detail="Every row needs a value for each key column")
+    keys = key_frame.astype(str).agg(DATASET_KEY_SEPARATOR.join, axis=1)
+    duplicates = int(keys.duplicated().sum())
+    if duplicates:
+        raise HTTPException(status_code=400, detail=f"{duplicates} rows repeat a key already used in this upload")
+    return keys.tolist()
+
+def acquire_dataset(user_id: str, name: str, key_fields: Optional[List[str]]) -> dict:
+    """Find or create the dataset and take its sync lease, so only one sync applies a diff at a time"""
+    dataset = regulatory_datasets_collection.find_one({"user_id": user_id, "name": name})
+    if dataset is None:
+        if not key_fields:
+            raise HTTPException(status_code=400, detail="Declare the key columns with ?key= on the first sync")
+        try:
+            regulatory_datasets_collection.insert_one({
+                "user_id": user_id,
+                "name": name,
+                "key_fields": key_fields,
+                "record_count": 0,
+                "version": 0,
+                "created_at": datetime.utcnow(),
+                "sync_started_at": None
+            })
+        except DuplicateKeyError:
+            pass
+    elif key_fields and key_fields != dataset["key_fields"]:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Dataset '{name}' is keyed by {', '.join(dataset['key_fields'])}"
+        )
+    now = datetime.utcnow()
+    dataset = regulatory_datasets_collection.find_one_and_update(
+        {
+            "user_id": user_id,
+            "name": name,
+            "$or": [
+                {"sync_started_at": None},
+                {"sync_started_at": {"$lt": now - timedelta(seconds=DATASET_SYNC_LEASE_SECONDS)}}
+            ]
+        },
+        {"$set": {"sync_started_at": now}},
+        return_document=ReturnDocument.AFTER
+    )
+    if dataset is None:
+        raise HTTPException(status_code=409, detail=f"Dataset '{name}' is already being synced")
+    return dataset
+
+def _unrecord_dataset_rows(user_id: str, documents: List[dict]):
+    # Take replaced and deleted rows back out of the month they were synced in
+    by_month = {}
+    for document in documents:
+        by_month.setdefault(_month_key(document["synced_at"]), (document["synced_at"], []))[1].append(document["row"])
+    for synced_at, rows in by_month.values():
+        record_regulatory_stats(user_id, summarize_regulatory_frame(pd.DataFrame(rows)), synced_at, direction=-1, count_upload=False)
+
+def sync_regulatory_dataset(user_id: str, name: str, key_fields: Optional[List[str]], file: UploadFile) -> dict:
+    """Apply an upload to a keyed dataset: upsert new and changed rows, delete rows the upload no longer has"""
+    dataset = acquire_dataset(user_id, name, key_fields)
+    try:
+        sha256 = hash_upload_file(file)
+        if dataset.get("sha256") == sha256:
+            return {
+                "success": True,
+                "dataset": name,
+                "unchanged_file": True,
+                "inserted": 0,
+                "updated": 0,
+                "deleted": 0,
+                "unchanged": dataset["record_count"],
+                "record_count": dataset["record_count"],
+                "version": dataset["version"]
+            }
+
+        content = file.file.read()
+        started = time.perf_counter()
+        df = read_upload_frame(content)
+        observe_upload_parse("dataset_sync", detect_upload_format(content[:6]), time.perf_counter() - started, len(df))
+        keys = dataset_row_keys(df, dataset["key_fields"])
+        # Missing timestamps arrive as NaT, which BSON cannot encode
+        for column in df.select_dtypes(include=["datetime", "datetimetz"]).columns:
+            df[column] = df[column].astype(object).where(df[column].notna(), None)
+        rows = df.to_dict("records")
+        hashes = [dataset_row_hash(row) for row in rows]
+
+        # Only keys and fingerprints are read back; full rows are fetched just for the ones that change
+        current = {
+            document["key"]: (document["_id"], document["row_hash"])
+            for document in dataset_rows_collection.find({"dataset_id": dataset["_id"]}, {"key": 1, "row_hash": 1})
+        }
+        changed = [index for index, key in enumerate(keys) if current.get(key, (None, None))[1] != hashes[index]]
+        incoming = set(keys)
+        replaced_ids = [current[keys[index]][0] for index in changed if keys[index] in current]
+        removed_ids = [row_id for key, (row_id, _) in current.items() if key not in incoming]
+
+        outgoing = []
+        for start in range(0, len(replaced_ids) + len(removed_ids), DATASET_WRITE_BATCH):
+            batch = (replaced_ids + removed_ids)[start:start + DATASET_WRITE_BATCH]
+            outgoing.extend(dataset_rows_collection.find({"_id": {"$in": batch}}, {"row": 1, "synced_at": 1}))
+
+        synced_at = datetime.utcnow()
+        for start in range(0, len(changed), DATASET_WRITE_BATCH):
+            dataset_rows_collection.bulk_write([
+                ReplaceOne(
+                    {"dataset_id": dataset["_id"], "key": keys[index]},
+                    {
+                        "dataset_id": dataset["_id"],
+                        "key": keys[index],
+                        "row_hash": hashes[index],
+                        "synced_at": synced_at,
+                        "row": rows[index]
+                    },
+                    upsert=True
+                )
+                for index in changed[start:start + DATASET_WRITE_BATCH]
+            ], ordered=False)
+        for start in range(0, len(removed_ids), DATASET_WRITE_BATCH):
+            dataset_rows_collection.delete_many({"_id": {"$in": removed_ids[start:start + DATASET_WRITE_BATCH]}})
+
+        if changed or removed_ids:
+            _unrecord_dataset_rows(user_id, outgoing)
+            # Syncs change the totals but are not uploads, so upload_count is left alone
+            record_regulatory_stats(user_id, summarize_regulatory_frame(df.iloc[changed]), synced_at, count_upload=False)
+            invalidate_user_overview(user_id)
+        dataset = regulatory_datasets_collection.find_one_and_update(
+            {"_id": dataset["_id"]},
+            {
+                "$set": {"sha256": sha256, "record_count": len(rows), "columns": list(df.columns), "updated_at": synced_at},
+                "$inc": {"version": 1}
+            },
+            return_document=ReturnDocument.AFTER
+        )
+        return {
+            "success": True,
+            "dataset": name,
+            "unchanged_file": False,
+            "inserted": len(changed) - len(replaced_ids),
+            "updated": len(replaced_ids),
+            "deleted": len(removed_ids),
+            "unchanged": len(rows) - len(changed),
+            "record_count": len(rows),
+            "version": dataset["version"]
+        }
+    finally:
+        regulatory_datasets_collection.update_one({"_id": dataset["_id"]}, {"$set": {"sync_started_at": None}})
+
+@app.post("/regulatory-scanner/datasets/{name}/sync")
+async def sync_dataset(
+    name: str,
+    file: UploadFile = File(...),
+    key: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """Bring a keyed dataset to the state of the uploaded file, writing only the rows that differ"""
+    key_fields = [field.strip() for field in key.split(",") if field.strip()] if key else None
+    try:
+        result = await run_db(sync_regulatory_dataset, current_user["id"], name, key_fields, file)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Dataset sync error")
+        raise HTTPException(status_code=400, detail=f"Error processing upload: {str(e)}")
+    logger.info("Dataset synced", extra={
+        "dataset": name,
+        "inserted": result["inserted"],
+        "updated": result["updated"],
+        "deleted": result["deleted"]
+    })
+    return FastJSONResponse(result)
+
+@app.get("/regulatory-scanner/datasets")
+async def list_datasets(current_user: dict = Depends(get_current_user)):
+    """List the current user's keyed datasets"""
+    datasets = await run_db(lambda: list(regulatory_datasets_collection.find(
+        {"user_id": current_user["id"]},
+        {"_id": 0, "name": 1, "key_fields": 1, "record_count": 1, "columns": 1, "version": 1, "updated_at": 1}
+    ).sort("name", 1)))
+    return {"success": True, "datasets": datasets}
+
+def find_dataset_row_page(user_id: str, name: str, cursor: Optional[str], limit: int, fields: Optional[List[str]]):
+    """Fetch one page of a dataset's current rows, in _id order, and the cursor for the next page"""
+    dataset = regulatory_datasets_collection.find_one({"user_id": user_id, "name": name}, {"_id": 1})
+    if dataset is None:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+    query = {"dataset_id": dataset["_id"]}
+    if cursor:
+        try:
+            query["_id"] = {"$gt": ObjectId(cursor)}
+        except Exception:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    projection = {f"row.{field}": 1 for field in fields} if fields else {"row": 1}
+    documents = list(dataset_rows_collection.find(query, projection).sort("_id", 1).limit(limit + 1))
+    next_cursor = str(documents[limit - 1]["_id"]) if len(documents) > limit else None
+    return [document.get("row", {}) for document in documents[:limit]], next_cursor
+
+@app.get("/regulatory-scanner/datasets/{name}/rows")
+async def get_dataset_rows(
+    name: str,
+    cursor: Optional[str] = None,
+    limit: int = DATASET_PAGE_SIZE,
+    fields: Optional[str] = None,
+    format: str = "json",
+    current_user: dict = Depends(get_current_user)
+):
+    """Get one page of a dataset's current rows"""
+    limit = max(1, min(limit, MAX_DATASET_PAGE_SIZE))
+    field_list = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+    rows, next_cursor = await run_db(find_dataset_row_page, current_user["id"], name, cursor, limit, field_list)
+    if format == "ndjson":
+        response = StreamingResponse((dumps_json(row) + b"\n" for row in rows), media_type="application/x-ndjson")
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return response
+    return FastJSONResponse({"success": True, "dataset": name, "data": rows, "next_cursor": next_cursor})
+
 @app.get("/regulatory-scanner")
-def regulatory_scanner():
-    return {
-        "regulations": [
-            {"id": 1, "name": "EU ETS", "status": "Compliant", "next_review": "2024-06-15"},
-            {"id": 2, "name": "US EPA", "status": "Pending", "next_review": "2024-04-20"},
-            {"id": 3, "name": "UK Carbon Tax", "status": "Compliant", "next_review": "2024-08-10"}
-        ]
-    }
+async def regulatory_scanner(request: Request, current_user: dict = Depends(get_current_user)):
+    def render(overview):
+        return {
+            "uploads": overview["upload_count"],
+            "records": overview["record_count"],
+            "last_upload_at": overview["last_upload_at"],
+            "industries": [
+                {
+                    **industry,
+                    "average_compliance_cost": round(industry["compliance_cost"] / industry["record_count"], 2)
+                    if industry["record_count"] else 0.0
+                }
+                for industry in overview["industries"]
+            ],
+            "active_alerts": overview["alerts"]["by_priority"]
+        }
+    return await serve_user_view(request, current_user["id"], "regulatory-scanner", render)
 
 if __name__ == "__main__":
     import uvicorn
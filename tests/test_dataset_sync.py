@@ -0,0 +1,60 @@
+import io
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+from starlette.datastructures import UploadFile
+
+import main
+
+
+def test_row_hash_accepts_timestamps_and_numpy_scalars():
+    row = {
+        "FacilityId": np.int64(7),
+        "Emissions": np.float32(1.5),
+        "ReportedAt": pd.Timestamp("2024-03-01 12:00"),
+        "ReviewedAt": pd.NaT,
+    }
+    assert main.dataset_row_hash(row) == main.dataset_row_hash(dict(row))
+    assert main.dataset_row_hash(row) != main.dataset_row_hash({**row, "ReportedAt": pd.Timestamp("2024-03-02")})
+
+
+@pytest.fixture
+def mongo(monkeypatch):
+    mongomock = pytest.importorskip("mongomock")
+    db = mongomock.MongoClient().db
+    monkeypatch.setattr(main, "db", db)
+    monkeypatch.setattr(main, "regulatory_datasets_collection", db.regulatory_datasets)
+    monkeypatch.setattr(main, "dataset_rows_collection", db.dataset_rows)
+    monkeypatch.setattr(main, "regulatory_stats_collection", db.regulatory_stats)
+    for collection, keys, options in main.INDEX_SPECS:
+        db[collection].create_index(keys, **options)
+    return db
+
+
+def _parquet_upload(df):
+    buffer = io.BytesIO()
+    df.to_parquet(buffer, index=False)
+    buffer.seek(0)
+    return UploadFile(file=buffer, filename="plants.parquet")
+
+
+def test_sync_parquet_with_datetime_column(mongo):
+    df = pd.DataFrame({
+        "Industry": ["Energy", "Energy", "Tech"],
+        "FacilityId": [1, 2, 1],
+        "Emissions": [10.0, 20.0, 5.0],
+        "ReportedAt": pd.to_datetime(["2024-01-01", None, "2024-02-01"]),
+    })
+    result = main.sync_regulatory_dataset("user", "plants", ["Industry", "FacilityId"], _parquet_upload(df))
+    assert (result["inserted"], result["updated"], result["deleted"]) == (3, 0, 0)
+
+    df.loc[0, "ReportedAt"] = pd.Timestamp("2024-06-01")
+    result = main.sync_regulatory_dataset("user", "plants", None, _parquet_upload(df))
+    assert (result["inserted"], result["updated"], result["unchanged"]) == (0, 1, 2)
+
+    rows, _ = main.find_dataset_row_page("user", "plants", None, 10, None)
+    reported = {(row["Industry"], row["FacilityId"]): row["ReportedAt"] for row in rows}
+    assert reported[("Energy", 1)] == datetime(2024, 6, 1)
+    assert reported[("Energy", 2)] is None